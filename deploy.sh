@@ -113,6 +113,7 @@ deploy_stack() {
     local stack_name=$1
     local template_file=$2
     local capabilities=$3
+    local parameters=$4
     
     log_info "Deploying stack: $stack_name..."
     
@@ -123,6 +124,7 @@ deploy_stack() {
             --stack-name "$stack_name" \
             --template-body "file://$template_file" \
             ${capabilities:+--capabilities $capabilities} \
+            ${parameters:+--parameters $parameters} \
             --region "$AWS_REGION" 2>&1 | grep -v "No updates are to be performed" || true
         
         aws cloudformation wait stack-update-complete \
@@ -133,6 +135,7 @@ deploy_stack() {
             --stack-name "$stack_name" \
             --template-body "file://$template_file" \
             ${capabilities:+--capabilities $capabilities} \
+            ${parameters:+--parameters $parameters} \
             --region "$AWS_REGION"
         
         aws cloudformation wait stack-create-complete \
@@ -146,7 +149,46 @@ deploy_stack() {
 # Deploy DynamoDB tables
 deploy_dynamodb() {
     log_info "Step 1/9: Deploying DynamoDB tables..."
-    deploy_stack "ITOps-DynamoDB" "infrastructure/dynamodb-tables.yaml"
+    
+    local stage=2
+    
+    # CloudFormation adds only one GSI per table per update, so an existing
+    # stack is walked through IncidentIndexStage one step at a time. Stacks
+    # from before the parameter existed are at stage 0; a new stack is
+    # created at stage 2 in one go.
+    if aws cloudformation describe-stacks --stack-name ITOps-DynamoDB --region "$AWS_REGION" &> /dev/null; then
+        stage=$(aws cloudformation describe-stacks \
+            --stack-name ITOps-DynamoDB \
+            --region "$AWS_REGION" \
+            --query "Stacks[0].Parameters[?ParameterKey=='IncidentIndexStage'].ParameterValue" \
+            --output text)
+        case "$stage" in
+            0|1|2) ;;
+            *) stage=0 ;;
+        esac
+        
+        while [ "$stage" -lt 2 ]; do
+            stage=$((stage + 1))
+            log_info "Adding Incidents index stage $stage/2..."
+            deploy_stack "ITOps-DynamoDB" "infrastructure/dynamodb-tables.yaml" "" \
+                "ParameterKey=IncidentIndexStage,ParameterValue=$stage"
+        done
+    fi
+    
+    deploy_stack "ITOps-DynamoDB" "infrastructure/dynamodb-tables.yaml" "" \
+        "ParameterKey=IncidentIndexStage,ParameterValue=$stage"
+}
+
+# Fill created_date / status_severity on incidents written before the
+# created-date-index and status-severity-index existed; safe to re-run
+backfill_incident_indexes() {
+    log_info "Backfilling Incidents index keys..."
+    
+    if python3 infrastructure/backfill-incident-index-keys.py --region "$AWS_REGION"; then
+        log_success "Incidents index keys backfilled"
+    else
+        log_warning "Backfill failed; re-run: python3 infrastructure/backfill-incident-index-keys.py --region $AWS_REGION"
+    fi
 }
 
 # Deploy IAM roles
@@ -598,6 +640,7 @@ main() {
     deploy_dynamodb
     deploy_iam
     deploy_lambda_functions
+    backfill_incident_indexes
     deploy_step_functions
     deploy_api_gateway
     create_s3_bucket
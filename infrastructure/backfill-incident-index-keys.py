@@ -0,0 +1,75 @@
+"""
+Backfill Incidents index keys
+Sets created_date and status_severity on incidents written before
+created-date-index / status-severity-index existed, so list_incidents finds
+them. Items that already have both are left alone; safe to re-run.
+
+Usage: python3 infrastructure/backfill-incident-index-keys.py [--region us-east-1]
+"""
+
+import argparse
+import time
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+
+def backfill(table) -> int:
+    """Scan the table and fill in missing index keys; returns items updated"""
+    
+    updated = 0
+    scan_kwargs = {
+        'ProjectionExpression': 'incident_id, created_at, #status, severity, created_date, status_severity',
+        'ExpressionAttributeNames': {'#status': 'status'}
+    }
+    
+    while True:
+        response = table.scan(**scan_kwargs)
+        
+        for item in response.get('Items', []):
+            updates = {}
+            if 'created_date' not in item:
+                updates['created_date'] = time.strftime('%Y-%m-%d', time.gmtime(int(item['created_at'])))
+            if 'status_severity' not in item and 'status' in item:
+                updates['status_severity'] = f"{item['status']}#{item.get('severity', 'medium')}"
+            
+            if not updates:
+                continue
+            
+            # The condition keeps a concurrently deleted incident from being
+            # recreated as a stub
+            try:
+                table.update_item(
+                    Key={'incident_id': item['incident_id'], 'created_at': item['created_at']},
+                    UpdateExpression='SET ' + ', '.join(f"{name} = :{name}" for name in updates),
+                    ConditionExpression='attribute_exists(incident_id)',
+                    ExpressionAttributeValues={f":{name}": value for name, value in updates.items()}
+                )
+                updated += 1
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+        
+        if 'LastEvaluatedKey' not in response:
+            return updated
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill ITOps-Incidents index keys')
+    parser.add_argument('--region', default=None)
+    parser.add_argument('--table', default='ITOps-Incidents')
+    args = parser.parse_args()
+    
+    dynamodb = boto3.resource(
+        'dynamodb',
+        region_name=args.region,
+        config=Config(retries={'mode': 'adaptive', 'max_attempts': 10})
+    )
+    
+    updated = backfill(dynamodb.Table(args.table))
+    print(f"Backfilled {updated} incidents")
+
+
+if __name__ == '__main__':
+    main()
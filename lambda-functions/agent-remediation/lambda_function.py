@@ -249,16 +249,20 @@ Be specific with actual AWS commands when possible."""
             
             if response.get('Items'):
                 created_at = response['Items'][0]['created_at']
+                severity = response['Items'][0].get('severity', 'medium')
+                new_status = 'resolved' if execution_result.get('status') == 'completed' else 'in_progress'
                 
                 incidents_table.update_item(
                     Key={'incident_id': incident_id, 'created_at': created_at},
                     UpdateExpression='''
                         SET #status = :status,
+                            status_severity = :status_severity,
                             timeline = list_append(timeline, :event)
                     ''',
                     ExpressionAttributeNames={'#status': 'status'},
                     ExpressionAttributeValues={
-                        ':status': 'resolved' if execution_result.get('status') == 'completed' else 'in_progress',
+                        ':status': new_status,
+                        ':status_severity': f"{new_status}#{severity}",
                         ':event': [{
                             'timestamp': int(datetime.now().timestamp()),
                             'event': 'remediation_executed',
@@ -183,6 +183,7 @@ Be thorough but concise. Focus on actionable insights."""
                 return
             
             created_at = response['Items'][0]['created_at']
+            status = response['Items'][0].get('status', 'open')
             
             incidents_table.update_item(
                 Key={
@@ -191,11 +192,13 @@ Be thorough but concise. Focus on actionable insights."""
                 },
                 UpdateExpression='''
                     SET severity = :severity,
+                        status_severity = :status_severity,
                         assigned_to = :assigned_to,
                         timeline = list_append(if_not_exists(timeline, :empty_list), :timeline_event)
                 ''',
                 ExpressionAttributeValues={
                     ':severity': assessment['severity'],
+                    ':status_severity': f"{status}#{assessment['severity']}",
                     ':assigned_to': assessment['routing'],
                     ':empty_list': [],
                     ':timeline_event': [{
@@ -196,7 +196,13 @@ def update_incident(incident_id, data):
     if not response.get('Items'):
         return {'statusCode': 404, 'body': {'error': 'Incident not found'}}
     
-    created_at = response['Items'][0]['created_at']
+    incident = response['Items'][0]
+    created_at = incident['created_at']
+    
+    # Index keys derived from other fields are maintained here, not by callers
+    derived = [key for key in ('status_severity', 'created_date') if key in data]
+    if derived:
+        return {'statusCode': 400, 'body': {'error': f"Fields cannot be set directly: {', '.join(derived)}"}}
     
     # Build update expression
     update_expr = []
@@ -212,6 +218,13 @@ def update_incident(incident_id, data):
     if not update_expr:
         return {'statusCode': 400, 'body': {'error': 'No valid fields to update'}}
     
+    # Keep the status-severity-index key in step with either field
+    if 'status' in data or 'severity' in data:
+        status = data.get('status', incident.get('status', 'open'))
+        severity = data.get('severity', incident.get('severity', 'medium'))
+        update_expr.append('status_severity = :status_severity')
+        expr_values[':status_severity'] = f"{status}#{severity}"
+    
     incidents_table.update_item(
         Key={'incident_id': incident_id, 'created_at': created_at},
         UpdateExpression='SET ' + ', '.join(update_expr),
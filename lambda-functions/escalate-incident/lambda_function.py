@@ -355,17 +355,20 @@ Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}
             
             if response.get('Items'):
                 created_at = response['Items'][0]['created_at']
+                severity = response['Items'][0].get('severity', 'medium')
                 
                 incidents_table.update_item(
                     Key={'incident_id': incident_id, 'created_at': created_at},
                     UpdateExpression='''
                         SET #status = :status,
+                            status_severity = :status_severity,
                             escalation_id = :esc_id,
                             timeline = list_append(if_not_exists(timeline, :empty_list), :event)
                     ''',
                     ExpressionAttributeNames={'#status': 'status'},
                     ExpressionAttributeValues={
                         ':status': 'escalated',
+                        ':status_severity': f"escalated#{severity}",
                         ':esc_id': escalation_id,
                         ':empty_list': [],
                         ':event': [{
@@ -4,21 +4,155 @@ Executes approved remediation plans with safety checks
 Supports rollback and verification
 """
 
+import base64
+import gzip
+import hashlib
+import hmac
 import json
+import logging
+import os
+import random
+import re
+import shlex
+import threading
+import time
+import uuid
 import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from decimal import Decimal
+from itertools import chain
 from typing import Dict, List, Tuple
 
-dynamodb = boto3.resource('dynamodb')
-lambda_client = boto3.client('lambda')
-cloudwatch = boto3.client('cloudwatch')
-ec2 = boto3.client('ec2')
-rds = boto3.client('rds')
-elbv2 = boto3.client('elbv2')
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
 
-incidents_table = dynamodb.Table('ITOps-Incidents')
-approval_queue_table = dynamodb.Table('ITOps-ApprovalQueue')
+# Compact JSON encoder shared by every payload/log serialization
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str).encode
+
+# Shared SDK config: larger pool, adaptive retries and explicit timeouts
+_CFG = Config(
+    max_pool_connections=50,
+    retries={'max_attempts': 5, 'mode': 'adaptive'},
+    connect_timeout=3,
+    read_timeout=10
+)
+
+dynamodb = boto3.resource('dynamodb', config=_CFG)
+# Synchronous invokes must be allowed to outlive the callee (max 15 min)
+lambda_client = boto3.client('lambda', config=_CFG.merge(Config(read_timeout=900)))
+# Clients only some remediations need (ec2, rds, elbv2, cloudwatch, s3, ...)
+# are created on first use so cold starts don't load every service model
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _client(service_name: str):
+    """Return the shared boto3 client for a service, creating it on first use"""
+    
+    client = _clients.get(service_name)
+    if client is None:
+        # boto3's default session isn't safe for concurrent client creation
+        with _clients_lock:
+            client = _clients.get(service_name)
+            if client is None:
+                client = _clients[service_name] = boto3.client(service_name, config=_CFG)
+    return client
+
+
+# Optional DAX cluster for the hot, read-mostly incident/approval items.
+# Writes pass through DAX to DynamoDB and keep the item cache coherent.
+DAX_ENDPOINT = os.environ.get('DAX_ENDPOINT')
+
+if DAX_ENDPOINT:
+    from amazondax import AmazonDaxClient
+    dax = AmazonDaxClient.resource(endpoint_url=DAX_ENDPOINT)
+    incidents_table = dax.Table('ITOps-Incidents')
+    approval_queue_table = dax.Table('ITOps-ApprovalQueue')
+else:
+    incidents_table = dynamodb.Table('ITOps-Incidents')
+    approval_queue_table = dynamodb.Table('ITOps-ApprovalQueue')
 remediation_log_table = dynamodb.Table('ITOps-RemediationLog')
+incident_timeline_table = dynamodb.Table('ITOps-IncidentTimeline')
+
+# Compressed execution details larger than this go to S3 (DynamoDB items cap at 400 KB)
+DETAILS_INLINE_LIMIT = 350_000
+REMEDIATION_LOG_BUCKET = os.environ.get('REMEDIATION_LOG_BUCKET')
+
+# Resolution verifier invoked asynchronously after a successful execution
+VERIFIER_ARN = os.environ.get('VERIFIER_ARN')
+
+# HMAC key for approval tokens issued by the approval processor
+APPROVAL_TOKEN_SECRET_ID = os.environ.get('APPROVAL_TOKEN_SECRET_ID')
+_approval_token_key = None
+
+
+def _get_approval_token_key() -> bytes:
+    """Fetch the approval token HMAC key once per container"""
+    
+    global _approval_token_key
+    if _approval_token_key is None and APPROVAL_TOKEN_SECRET_ID:
+        secret = _client('secretsmanager').get_secret_value(SecretId=APPROVAL_TOKEN_SECRET_ID)
+        _approval_token_key = secret['SecretString'].encode()
+    return _approval_token_key
+
+BATCH_WRITE_LIMIT = 25  # DynamoDB BatchWriteItem maximum
+BATCH_WRITE_ATTEMPTS = 5
+
+
+class RemediationLogWriteError(Exception):
+    """Raised when buffered log/timeline records could not be written to DynamoDB"""
+
+
+def _check_write_response(response: Dict, operation: str):
+    """Raise if a DynamoDB write did not come back with HTTP 200"""
+    
+    status_code = response.get('ResponseMetadata', {}).get('HTTPStatusCode', 200)
+    if status_code != 200:
+        raise RemediationLogWriteError(f"{operation} returned HTTP {status_code}")
+
+
+def _parse_command(command: str) -> Dict:
+    """
+    Tokenize an AWS CLI style command once
+    
+    'aws ec2 reboot-instances --instance-ids i-1' ->
+    {'service': 'ec2', 'operation': 'reboot-instances', 'params': {'instance-ids': 'i-1'}}
+    """
+    
+    try:
+        tokens = shlex.split(command)
+    except ValueError:
+        tokens = command.split()
+    
+    parsed = {'service': None, 'operation': None, 'params': {}}
+    if len(tokens) < 3 or tokens[0] != 'aws':
+        return parsed
+    
+    parsed['service'] = tokens[1].lower()
+    parsed['operation'] = tokens[2].lower()
+    
+    i = 3
+    while i < len(tokens):
+        token = tokens[i]
+        if token.startswith('--'):
+            if i + 1 < len(tokens) and not tokens[i + 1].startswith('--'):
+                parsed['params'][token[2:]] = tokens[i + 1]
+                i += 2
+                continue
+            parsed['params'][token[2:]] = True
+        i += 1
+    
+    return parsed
+
+
+def _event_sort_key(event_ms: int) -> Decimal:
+    """Timeline sort key: epoch ms plus a random fraction, so events other
+    writers log for the same incident in the same millisecond don't overwrite"""
+    return Decimal(f"{event_ms}.{uuid.uuid4().int % 10**12:012d}")
+
 
 class RemediationExecutor:
     """Executes remediation actions with safety checks"""
@@ -26,12 +160,23 @@ class RemediationExecutor:
     def __init__(self):
         self.executor_id = 'remediation-executor'
         self.dry_run = False  # Set to True for testing
+        self.incidents_table = incidents_table
+        self.approval_queue_table = approval_queue_table
+        self.remediation_log_table = remediation_log_table
+        self.incident_timeline_table = incident_timeline_table
+        # Actions are blocking AWS calls, so run independent ones concurrently
+        self._pool = ThreadPoolExecutor(max_workers=16)
+        # (table_name, item) puts buffered until flush_logs() at the end of the handler run
+        self._pending_writes = []
     
     def execute(
         self,
         incident_id: str,
         remediation_plan: Dict,
-        approval_id: str = None
+        approval_id: str = None,
+        created_at: int = None,
+        incident: Dict = None,
+        approval_token: str = None
     ) -> Dict:
         """
         Execute remediation plan
@@ -40,6 +185,9 @@ class RemediationExecutor:
             incident_id: Incident identifier
             remediation_plan: Full remediation plan
             approval_id: Optional approval ID (required for high-risk)
+            created_at: Optional incident sort key (skips the incident lookup)
+            incident: Optional incident details forwarded to the verifier
+            approval_token: Optional signed token proving approval_id was granted
         
         Returns:
             Execution results with success/failure status
@@ -47,7 +195,7 @@ class RemediationExecutor:
         
         # Verify approval if required
         if approval_id:
-            approved = self._verify_approval(approval_id)
+            approved = self._verify_approval(approval_id, approval_token)
             if not approved:
                 return {
                     'incident_id': incident_id,
@@ -66,34 +214,49 @@ class RemediationExecutor:
                 'executed_actions': []
             }
         
+        # Read the clock once per phase and reuse the values
+        now = datetime.now()
+        now_ts = int(now.timestamp())
+        now_iso = now.isoformat()
+        
         # Execute actions
         results = {
             'incident_id': incident_id,
-            'execution_id': f"EXEC-{int(datetime.now().timestamp())}",
+            # Epoch prefix keeps IDs time-sortable; random suffix keeps two
+            # executions started in the same second from sharing a log row
+            'execution_id': f"EXEC-{now_ts}-{uuid.uuid4().hex[:12].upper()}",
             'status': 'in_progress',
-            'started_at': datetime.now().isoformat(),
+            'started_at': now_iso,
             'immediate_actions': [],
             'corrective_actions': [],
             'failed_actions': [],
             'rollback_performed': False
         }
         
-        # Execute immediate actions
-        for action in remediation_plan.get('immediate_actions', []):
-            result = self._execute_action(action, 'immediate')
+        # Execute immediate actions: critical ones serially (abort on failure),
+        # the rest concurrently
+        immediate_actions = remediation_plan.get('immediate_actions', [])
+        critical = [a for a in immediate_actions if a.get('critical', False)]
+        non_critical = [a for a in immediate_actions if not a.get('critical', False)]
+        
+        for action in critical:
+            result = self._execute_action(action, 'immediate', now_iso)
+            results['immediate_actions'].append(result)
+            
+            if not result['success']:
+                results['failed_actions'].append(result)
+                results['status'] = 'failed'
+                results['message'] = f"Critical action failed: {action.get('action')}"
+                return results
+        
+        for result in self._execute_parallel(non_critical, 'immediate', now_iso):
             results['immediate_actions'].append(result)
             
             if not result['success']:
                 results['failed_actions'].append(result)
-                # Stop if critical action fails
-                if action.get('critical', False):
-                    results['status'] = 'failed'
-                    results['message'] = f"Critical action failed: {action.get('action')}"
-                    return results
         
         # Execute corrective actions
-        for action in remediation_plan.get('corrective_actions', []):
-            result = self._execute_action(action, 'corrective')
+        for result in self._execute_parallel(remediation_plan.get('corrective_actions', []), 'corrective', now_iso):
             results['corrective_actions'].append(result)
             
             if not result['success']:
@@ -110,61 +273,100 @@ class RemediationExecutor:
             results['status'] = 'failed'
             results['message'] = 'Remediation failed'
         
-        results['completed_at'] = datetime.now().isoformat()
+        completed = datetime.now()
+        completed_ms = int(completed.timestamp() * 1000)
+        completed_ts = completed_ms // 1000
+        results['completed_at'] = completed.isoformat()
         
         # Log execution
-        self._log_execution(incident_id, results)
+        self._log_execution(incident_id, results, completed_ts)
         
         # Update incident
-        self._update_incident(incident_id, results)
+        self._update_incident(
+            incident_id, results, completed_ms, created_at, (incident or {}).get('severity')
+        )
         
         # Verify remediation success
         if results['status'] in ['success', 'partial_success']:
-            verification = self._verify_remediation(incident_id, remediation_plan)
-            results['verification'] = verification
+            if VERIFIER_ARN:
+                results['verification'] = self._dispatch_verification(
+                    incident_id, remediation_plan, results['execution_id'], incident
+                )
+            else:
+                results['verification'] = self._verify_remediation(incident_id, remediation_plan)
         
         return results
     
-    def _verify_approval(self, approval_id: str) -> bool:
+    def _verify_approval(self, approval_id: str, approval_token: str = None) -> bool:
         """Verify that approval has been granted"""
         
+        # A valid signed token proves the grant without a DynamoDB read
+        if approval_token and self._verify_approval_token(approval_id, approval_token):
+            logger.info("Approval %s verified by token", approval_id)
+            return True
+        
         try:
-            response = approval_queue_table.query(
-                KeyConditionExpression='approval_id = :id',
-                ExpressionAttributeValues={':id': approval_id}
+            response = self.approval_queue_table.get_item(
+                Key={'approval_id': approval_id},
+                # Approval was usually granted moments ago: bypass the DAX cache
+                ConsistentRead=True,
+                ProjectionExpression='#s',
+                ExpressionAttributeNames={'#s': 'status'}
             )
             
-            items = response.get('Items', [])
-            if not items:
-                print(f"Approval {approval_id} not found")
+            approval = response.get('Item')
+            if not approval:
+                logger.info("Approval %s not found", approval_id)
                 return False
             
-            approval = items[0]
             status = approval.get('status', 'pending')
             
             if status == 'approved':
-                print(f"Approval {approval_id} verified")
+                logger.info("Approval %s verified", approval_id)
                 return True
             else:
-                print(f"Approval {approval_id} not approved (status: {status})")
+                logger.info("Approval %s not approved (status: %s)", approval_id, status)
+                return False
+        
+        except Exception as e:
+            logger.error("Error verifying approval: %s", e)
+            return False
+    
+    def _verify_approval_token(self, approval_id: str, token: str) -> bool:
+        """Validate a base64(approval_id|expiry|hmac_sha256) approval token"""
+        
+        try:
+            key = _get_approval_token_key()
+            if not key:
+                return False
+            
+            token_approval_id, expiry, signature = base64.urlsafe_b64decode(token).decode().rsplit('|', 2)
+            if token_approval_id != approval_id or int(expiry) <= int(time.time()):
                 return False
+            
+            expected = hmac.new(key, f"{token_approval_id}|{expiry}".encode(), hashlib.sha256).hexdigest()
+            return hmac.compare_digest(expected, signature)
         
         except Exception as e:
-            print(f"Error verifying approval: {e}")
+            logger.warning("Invalid approval token: %s", e)
             return False
     
     def _pre_execution_safety_check(self, plan: Dict) -> Dict:
         """Perform safety checks before execution"""
         
-        # Check 1: No destructive actions without reversibility
-        all_actions = plan.get('immediate_actions', []) + plan.get('corrective_actions', [])
-        
-        for action in all_actions:
-            if action.get('risk') == 'high' and not action.get('reversible', False):
-                return {
-                    'safe': False,
-                    'reason': f"High-risk irreversible action: {action.get('action')}"
-                }
+        # Check 1: No destructive actions without reversibility (stops at first offender)
+        offender = next(
+            (
+                action for action in chain(plan.get('immediate_actions', ()), plan.get('corrective_actions', ()))
+                if action.get('risk') == 'high' and not action.get('reversible', False)
+            ),
+            None
+        )
+        if offender is not None:
+            return {
+                'safe': False,
+                'reason': f"High-risk irreversible action: {offender.get('action')}"
+            }
         
         # Check 2: Maximum execution time not exceeded
         # (Add your business logic here)
@@ -174,53 +376,53 @@ class RemediationExecutor:
         
         return {'safe': True, 'reason': 'All safety checks passed'}
     
-    def _execute_action(self, action: Dict, action_type: str) -> Dict:
+    def _execute_parallel(self, actions: List[Dict], action_type: str, now_iso: str) -> List[Dict]:
+        """Execute independent actions concurrently, preserving plan order"""
+        
+        if len(actions) <= 1:
+            return [self._execute_action(action, action_type, now_iso) for action in actions]
+        
+        return list(self._pool.map(lambda a: self._execute_action(a, action_type, now_iso), actions))
+    
+    def _execute_action(self, action: Dict, action_type: str, now_iso: str) -> Dict:
         """Execute a single remediation action"""
         
         action_name = action.get('action', 'Unknown')
         command = action.get('command', '')
         risk = action.get('risk', 'medium')
         
-        print(f"Executing {action_type} action: {action_name}")
-        print(f"Command: {command}")
-        print(f"Risk: {risk}")
+        logger.info("Executing %s action: %s (risk: %s) command: %s", action_type, action_name, risk, command)
         
         result = {
             'action': action_name,
             'type': action_type,
             'risk': risk,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': now_iso,
             'success': False,
             'output': '',
             'error': None
         }
         
         try:
-            # Determine action category and execute
-            if 'lambda' in command.lower():
-                result.update(self._execute_lambda_action(command))
-            elif 'ec2' in command.lower():
-                result.update(self._execute_ec2_action(command))
-            elif 'rds' in command.lower():
-                result.update(self._execute_rds_action(command))
-            elif 'scaling' in command.lower() or 'autoscaling' in command.lower():
-                result.update(self._execute_scaling_action(command))
-            elif 'restart' in command.lower():
-                result.update(self._execute_restart_action(command))
-            else:
-                # Generic execution (simulated)
-                result.update(self._simulate_action(command))
+            # Determine action category from the parsed service; free-form
+            # commands fall back to a keyword scan, the rest are simulated
+            parsed = _parse_command(command)
+            handler = self._SVC_HANDLERS.get(parsed['service'])
+            if handler is None:
+                match = self._TOKEN_RE.search(command.lower())
+                handler = self._DISPATCH[match.group(1)] if match else RemediationExecutor._simulate_action
+            result.update(handler(self, command, parsed, action))
             
             result['success'] = True
             
         except Exception as e:
             result['success'] = False
             result['error'] = str(e)
-            print(f"Action failed: {e}")
+            logger.warning("Action failed: %s", e)
         
         return result
     
-    def _execute_lambda_action(self, command: str) -> Dict:
+    def _execute_lambda_action(self, command: str, parsed: Dict, action: Dict) -> Dict:
         """Execute Lambda-related actions"""
         
         if self.dry_run:
@@ -229,8 +431,23 @@ class RemediationExecutor:
                 'simulated': True
             }
         
+        # Fire-and-forget actions (log rotation, cache flush, ...) are queued
+        # with an async invoke so we don't pay for the callee's duration
+        if action.get('async', False):
+            function_name = action.get('function_name') or parsed['params'].get('function-name')
+            if function_name:
+                response = lambda_client.invoke(
+                    FunctionName=function_name,
+                    InvocationType='Event',
+                    Payload=_encode(action.get('payload', {})).encode()
+                )
+                return {
+                    'output': 'queued',
+                    'status_code': response['StatusCode']
+                }
+        
         # Example: Update Lambda memory configuration
-        if 'update-function-configuration' in command:
+        if parsed['operation'] == 'update-function-configuration':
             # Parse command to extract function name and settings
             # aws lambda update-function-configuration --function-name X --memory-size Y
             return {
@@ -243,7 +460,7 @@ class RemediationExecutor:
             'simulated': True
         }
     
-    def _execute_ec2_action(self, command: str) -> Dict:
+    def _execute_ec2_action(self, command: str, parsed: Dict, action: Dict) -> Dict:
         """Execute EC2-related actions"""
         
         if self.dry_run:
@@ -253,7 +470,7 @@ class RemediationExecutor:
             }
         
         # Example: Restart EC2 instance
-        if 'reboot-instances' in command:
+        if parsed['operation'] == 'reboot-instances':
             return {
                 'output': 'EC2 instances restarted (simulated)',
                 'simulated': True
@@ -264,7 +481,7 @@ class RemediationExecutor:
             'simulated': True
         }
     
-    def _execute_rds_action(self, command: str) -> Dict:
+    def _execute_rds_action(self, command: str, parsed: Dict, action: Dict) -> Dict:
         """Execute RDS-related actions"""
         
         if self.dry_run:
@@ -274,7 +491,7 @@ class RemediationExecutor:
             }
         
         # Example: Modify RDS instance
-        if 'modify-db-instance' in command:
+        if parsed['operation'] == 'modify-db-instance':
             return {
                 'output': 'RDS instance modified (simulated)',
                 'simulated': True
@@ -285,7 +502,7 @@ class RemediationExecutor:
             'simulated': True
         }
     
-    def _execute_scaling_action(self, command: str) -> Dict:
+    def _execute_scaling_action(self, command: str, parsed: Dict, action: Dict) -> Dict:
         """Execute auto-scaling actions"""
         
         if self.dry_run:
@@ -299,7 +516,7 @@ class RemediationExecutor:
             'simulated': True
         }
     
-    def _execute_restart_action(self, command: str) -> Dict:
+    def _execute_restart_action(self, command: str, parsed: Dict, action: Dict) -> Dict:
         """Execute restart/reboot actions"""
         
         if self.dry_run:
@@ -313,7 +530,7 @@ class RemediationExecutor:
             'simulated': True
         }
     
-    def _simulate_action(self, command: str) -> Dict:
+    def _simulate_action(self, command: str, parsed: Dict, action: Dict) -> Dict:
         """Simulate generic action execution"""
         
         return {
@@ -321,6 +538,60 @@ class RemediationExecutor:
             'simulated': True
         }
     
+    # 'aws <service> ...' -> handler
+    _SVC_HANDLERS = {
+        'lambda': _execute_lambda_action,
+        'ec2': _execute_ec2_action,
+        'rds': _execute_rds_action,
+        'autoscaling': _execute_scaling_action,
+        'application-autoscaling': _execute_scaling_action
+    }
+    
+    # Keyword fallback for free-form commands (first keyword in the command wins)
+    _TOKEN_RE = re.compile(r'\b(lambda|ec2|rds|autoscaling|scaling|restart)\b')
+    _DISPATCH = {
+        'lambda': _execute_lambda_action,
+        'ec2': _execute_ec2_action,
+        'rds': _execute_rds_action,
+        'autoscaling': _execute_scaling_action,
+        'scaling': _execute_scaling_action,
+        'restart': _execute_restart_action
+    }
+    
+    def _dispatch_verification(
+        self,
+        incident_id: str,
+        plan: Dict,
+        execution_id: str,
+        incident: Dict = None
+    ) -> Dict:
+        """Queue verification on the resolution verifier instead of waiting for it"""
+        
+        # The verifier records its outcome on the incident itself. The actions
+        # have already run, so a failed dispatch is reported, not raised
+        try:
+            response = lambda_client.invoke(
+                FunctionName=VERIFIER_ARN,
+                InvocationType='Event',
+                Payload=_encode({
+                    'incident_id': incident_id,
+                    'incident': incident or {'incident_id': incident_id},
+                    'remediation_plan': plan,
+                    'execution_id': execution_id
+                }).encode()
+            )
+        except Exception as e:
+            logger.error("Error dispatching verification for %s: %s", incident_id, e)
+            return {
+                'status': 'dispatch_failed',
+                'error': str(e)
+            }
+        
+        return {
+            'status': 'queued',
+            'status_code': response['StatusCode']
+        }
+    
     def _verify_remediation(self, incident_id: str, plan: Dict) -> Dict:
         """Verify that remediation was successful"""
         
@@ -347,65 +618,150 @@ class RemediationExecutor:
         
         return verification_results
     
-    def _log_execution(self, incident_id: str, results: Dict):
-        """Log execution to DynamoDB"""
+    def _log_execution(self, incident_id: str, results: Dict, now_ts: int):
+        """Buffer execution log record (written by flush_logs)"""
         
         try:
-            remediation_log_table.put_item(
-                Item={
-                    'execution_id': results['execution_id'],
-                    'incident_id': incident_id,
-                    'timestamp': int(datetime.now().timestamp()),
-                    'status': results['status'],
-                    'actions_executed': len(results['immediate_actions']) + len(results['corrective_actions']),
-                    'actions_failed': len(results['failed_actions']),
-                    'details': results,
-                    'ttl': int(datetime.now().timestamp()) + 2592000  # 30 days
-                }
-            )
+            item = {
+                'execution_id': results['execution_id'],
+                'incident_id': incident_id,
+                'timestamp': now_ts,
+                'status': results['status'],
+                'actions_executed': len(results['immediate_actions']) + len(results['corrective_actions']),
+                'actions_failed': len(results['failed_actions']),
+                'ttl': now_ts + 2592000  # 30 days
+            }
+            item.update(self._pack_details(results))
+            self._pending_writes.append((self.remediation_log_table.name, item))
         
         except Exception as e:
-            print(f"Error logging execution: {e}")
+            logger.error("Error logging execution: %s", e)
     
-    def _update_incident(self, incident_id: str, results: Dict):
+    def _pack_details(self, results: Dict) -> Dict:
+        """Compress execution details; offload to S3 when too large to inline"""
+        
+        raw = gzip.compress(_encode(results).encode())
+        blob = base64.b64encode(raw).decode()
+        
+        if len(blob) <= DETAILS_INLINE_LIMIT:
+            return {'details_gz': blob}
+        
+        if REMEDIATION_LOG_BUCKET:
+            key = f"remediation/{results['execution_id']}.json.gz"
+            _client('s3').put_object(Bucket=REMEDIATION_LOG_BUCKET, Key=key, Body=raw)
+            return {'details_s3_key': key}
+        
+        logger.warning("Execution details for %s too large to store (%d bytes)", results['execution_id'], len(blob))
+        return {'details_truncated': True}
+    
+    def flush_logs(self):
+        """Write buffered log/timeline records to DynamoDB in batches of 25"""
+        
+        pending, self._pending_writes = self._pending_writes, []
+        
+        for start in range(0, len(pending), BATCH_WRITE_LIMIT):
+            request_items = {}
+            for table_name, item in pending[start:start + BATCH_WRITE_LIMIT]:
+                request_items.setdefault(table_name, []).append({'PutRequest': {'Item': item}})
+            self._batch_write(request_items)
+    
+    def _batch_write(self, request_items: Dict):
+        """Issue BatchWriteItem, resubmitting any UnprocessedItems"""
+        
+        for attempt in range(BATCH_WRITE_ATTEMPTS):
+            if attempt:
+                # Throttled: exponential backoff with jitter before resubmitting
+                time.sleep(min(1.0, 0.05 * 2 ** attempt) + random.random() * 0.05)
+            
+            response = self.remediation_log_table.meta.client.batch_write_item(
+                RequestItems=request_items
+            )
+            _check_write_response(response, 'BatchWriteItem')
+            request_items = response.get('UnprocessedItems') or {}
+            if not request_items:
+                return
+        
+        raise RemediationLogWriteError(
+            f"{sum(len(r) for r in request_items.values())} items unprocessed after {BATCH_WRITE_ATTEMPTS} attempts"
+        )
+    
+    def _update_incident(
+        self,
+        incident_id: str,
+        results: Dict,
+        now_ms: int,
+        created_at: int = None,
+        severity: str = None
+    ):
         """Update incident with execution results"""
         
         try:
-            response = incidents_table.query(
-                KeyConditionExpression='incident_id = :id',
-                ExpressionAttributeValues={':id': incident_id}
-            )
+            if created_at is None:
+                response = self.incidents_table.query(
+                    KeyConditionExpression='incident_id = :id',
+                    ExpressionAttributeValues={':id': incident_id},
+                    ProjectionExpression='created_at, severity',
+                    Limit=1
+                )
+                if response.get('Items'):
+                    created_at = response['Items'][0]['created_at']
+                    severity = severity or response['Items'][0].get('severity')
             
-            if response.get('Items'):
-                created_at = response['Items'][0]['created_at']
-                
+            elif not severity:
+                # Sort key known but severity not; read just that attribute
+                response = self.incidents_table.get_item(
+                    Key={'incident_id': incident_id, 'created_at': created_at},
+                    ProjectionExpression='severity'
+                )
+                severity = response.get('Item', {}).get('severity')
+            
+            if created_at is not None:
                 new_status = 'resolved' if results['status'] == 'success' else 'in_progress'
                 
-                incidents_table.update_item(
-                    Key={'incident_id': incident_id, 'created_at': created_at},
-                    UpdateExpression='''
-                        SET #status = :status,
-                            timeline = list_append(if_not_exists(timeline, :empty_list), :event)
-                    ''',
-                    ExpressionAttributeNames={'#status': 'status'},
-                    ExpressionAttributeValues={
-                        ':status': new_status,
-                        ':empty_list': [],
-                        ':event': [{
-                            'timestamp': int(datetime.now().timestamp()),
-                            'event': 'remediation_executed',
-                            'actor': 'remediation_executor',
-                            'details': json.dumps({
-                                'execution_id': results['execution_id'],
-                                'status': results['status'],
-                                'actions_executed': len(results['immediate_actions']) + len(results['corrective_actions'])
-                            })
-                        }]
+                # status_severity keys status-severity-index, so it is always
+                # rewritten alongside status (never removed, which would drop
+                # the incident from the index). The condition keeps a wrong or
+                # stale created_at from upserting a phantom incident.
+                try:
+                    self.incidents_table.update_item(
+                        Key={'incident_id': incident_id, 'created_at': created_at},
+                        UpdateExpression='SET #status = :status, status_severity = :status_severity',
+                        ConditionExpression='attribute_exists(incident_id)',
+                        ExpressionAttributeNames={'#status': 'status'},
+                        ExpressionAttributeValues={
+                            ':status': new_status,
+                            ':status_severity': f"{new_status}#{severity or 'medium'}"
+                        },
+                        ReturnConsumedCapacity='NONE'
+                    )
+                except ClientError as e:
+                    if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                        raise
+                    logger.warning("Incident %s (created_at %s) not found; skipping update", incident_id, created_at)
+                    return
+                
+                # Timeline events live in their own table (one fixed-size item
+                # per event) instead of a list that is rewritten on every append
+                self._pending_writes.append((self.incident_timeline_table.name, {
+                    'incident_id': incident_id,
+                    'event_ts': _event_sort_key(now_ms),
+                    'timestamp': now_ms // 1000,
+                    'event': 'remediation_executed',
+                    'actor': 'remediation_executor',
+                    # Stored as a native map so readers don't have to json.loads it
+                    'details': {
+                        'execution_id': results['execution_id'],
+                        'status': results['status'],
+                        'actions_executed': len(results['immediate_actions']) + len(results['corrective_actions'])
                     }
-                )
+                }))
         
         except Exception as e:
-            print(f"Error updating incident: {e}")
+            logger.error("Error updating incident: %s", e)
+
+
+# Reused across warm invocations of the same container
+executor = RemediationExecutor()
 
 
 def lambda_handler(event, context):
@@ -416,16 +772,22 @@ def lambda_handler(event, context):
     {
         "incident_id": "INC-XXXXX",
         "remediation_plan": {...},
-        "approval_id": "APPR-XXXXX" (optional)
+        "approval_id": "APPR-XXXXX" (optional),
+        "approval_token": "..." (optional, signed proof of approval),
+        "created_at": 1700000000 (optional, incident sort key),
+        "incident": {...} (optional, forwarded to the verifier)
     }
     """
     
-    print(f"Remediation Executor received: {json.dumps(event)}")
+    logger.info("Remediation Executor received: %s", _encode(event))
     
     try:
         incident_id = event.get('incident_id')
         remediation_plan = event.get('remediation_plan')
         approval_id = event.get('approval_id')
+        created_at = event.get('created_at')
+        incident = event.get('incident')
+        approval_token = event.get('approval_token')
         
         if not incident_id or not remediation_plan:
             return {
@@ -438,8 +800,9 @@ def lambda_handler(event, context):
             }
         
         # Execute remediation
-        executor = RemediationExecutor()
-        result = executor.execute(incident_id, remediation_plan, approval_id)
+        result = executor.execute(
+            incident_id, remediation_plan, approval_id, created_at, incident, approval_token
+        )
         
         return {
             'statusCode': 200,
@@ -447,9 +810,7 @@ def lambda_handler(event, context):
         }
     
     except Exception as e:
-        print(f"Error in remediation executor: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in remediation executor: %s", e)
         
         return {
             'statusCode': 500,
@@ -458,4 +819,12 @@ def lambda_handler(event, context):
                 'status': 'error',
                 'message': f'Execution failed: {str(e)}'
             }
-        }
\ No newline at end of file
+        }
+    
+    finally:
+        # Always drain the buffer so this run's records never leak into the
+        # next invocation of the warm executor
+        try:
+            executor.flush_logs()
+        except Exception as e:
+            logger.error("Error logging execution: %s", e)
\ No newline at end of file
@@ -4,95 +4,357 @@ Handles incident CRUD operations and AI analysis
 """
 
 import json
+import logging
+import os
+import re
+import time
 import boto3
-from datetime import datetime
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
 import uuid
 from typing import Dict
 
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:  # orjson missing from the package; fall back to stdlib
+    def _dumps(obj, default=None):
+        return json.dumps(obj, default=default).encode()
+    _loads = json.loads
+
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
+
 dynamodb = boto3.resource('dynamodb')
-bedrock_runtime = boto3.client('bedrock-runtime')
+# Low-level client for the hot create/get paths; items are passed in
+# DynamoDB's typed format. (The resource's meta.client would still apply the
+# resource layer's conversion and wrap them a second time.)
+ddb = boto3.client('dynamodb')
+_serialize = TypeSerializer().serialize
+_deserialize = TypeDeserializer().deserialize
+bedrock_runtime = boto3.client(
+    'bedrock-runtime',
+    config=Config(
+        max_pool_connections=10,
+        retries={'mode': 'standard', 'max_attempts': 2},
+        tcp_keepalive=True,
+        connect_timeout=2,
+        read_timeout=60
+    )
+)
+
+# Optionally open the Bedrock connection during init, outside the first
+# billed invocation. Any cheap runtime-endpoint call does; failures are ignored.
+if os.environ.get('BEDROCK_PREWARM') == 'true':
+    try:
+        bedrock_runtime.list_async_invokes(maxResults=1)
+    except Exception as e:
+        logger.warning("Bedrock prewarm failed: %s", e)
 
 incidents_table = dynamodb.Table('ITOps-Incidents')
 kb_table = dynamodb.Table('ITOps-KnowledgeBase')
+# One item per timeline event, keyed (incident_id, event_ts: ms + random fraction)
+timeline_table = dynamodb.Table('ITOps-IncidentTimeline')
+
+# How many daily buckets list_incidents walks back without a status filter
+LIST_LOOKBACK_DAYS = int(os.environ.get('LIST_LOOKBACK_DAYS', '30'))
+
+BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', 'anthropic.claude-3-5-sonnet-20241022-v2:0')
+
+# Latency-optimized inference is only offered in a few regions
+_LATENCY_OPTIMIZED_REGIONS = frozenset({'us-east-2', 'us-west-2'})
+_INVOKE_OPTIONS = (
+    {'performanceConfigLatency': 'optimized'}
+    if bedrock_runtime.meta.region_name in _LATENCY_OPTIMIZED_REGIONS else {}
+)
+
+# Runs the Bedrock calls of analyze_incident_multi side by side
+_analysis_pool = ThreadPoolExecutor(max_workers=3)
+
+# DynamoDB reserved words; only these (and names that aren't plain
+# identifiers) need an ExpressionAttributeNames alias in update_incident
+_DDB_RESERVED = frozenset("""
+    ABORT ABSOLUTE ACTION ADD AFTER AGENT AGGREGATE ALL ALLOCATE ALTER
+    ANALYZE AND ANY ARCHIVE ARE ARRAY AS ASC ASCII ASENSITIVE ASSERTION
+    ASYMMETRIC AT ATOMIC ATTACH ATTRIBUTE AUTH AUTHORIZATION AUTHORIZE AUTO
+    AVG BACK BACKUP BASE BATCH BEFORE BEGIN BETWEEN BIGINT BINARY BIT BLOB
+    BLOCK BOOLEAN BOTH BREADTH BUCKET BULK BY BYTE CALL CALLED CALLING
+    CAPACITY CASCADE CASCADED CASE CAST CATALOG CHAR CHARACTER CHECK CLASS
+    CLOB CLOSE CLUSTER CLUSTERED CLUSTERING CLUSTERS COALESCE COLLATE
+    COLLATION COLLECTION COLUMN COLUMNS COMBINE COMMENT COMMIT COMPACT
+    COMPILE COMPRESS CONDITION CONFLICT CONNECT CONNECTION CONSISTENCY
+    CONSISTENT CONSTRAINT CONSTRAINTS CONSTRUCTOR CONSUMED CONTINUE CONVERT
+    COPY CORRESPONDING COUNT COUNTER CREATE CROSS CUBE CURRENT CURSOR CYCLE
+    DATA DATABASE DATE DATETIME DAY DEALLOCATE DEC DECIMAL DECLARE DEFAULT
+    DEFERRABLE DEFERRED DEFINE DEFINED DEFINITION DELETE DELIMITED DEPTH
+    DEREF DESC DESCRIBE DESCRIPTOR DETACH DETERMINISTIC DIAGNOSTICS
+    DIRECTORIES DISABLE DISCONNECT DISTINCT DISTRIBUTE DO DOMAIN DOUBLE DROP
+    DUMP DURATION DYNAMIC EACH ELEMENT ELSE ELSEIF EMPTY ENABLE END EQUAL
+    EQUALS ERROR ESCAPE ESCAPED EVAL EVALUATE EXCEEDED EXCEPT EXCEPTION
+    EXCEPTIONS EXCLUSIVE EXEC EXECUTE EXISTS EXIT EXPLAIN EXPLODE EXPORT
+    EXPRESSION EXTENDED EXTERNAL EXTRACT FAIL FALSE FAMILY FETCH FIELDS FILE
+    FILTER FILTERING FINAL FINISH FIRST FIXED FLATTERN FLOAT FOR FORCE
+    FOREIGN FORMAT FORWARD FOUND FREE FROM FULL FUNCTION FUNCTIONS GENERAL
+    GENERATE GET GLOB GLOBAL GO GOTO GRANT GREATER GROUP GROUPING HANDLER
+    HASH HAVE HAVING HEAP HIDDEN HOLD HOUR IDENTIFIED IDENTITY IF IGNORE
+    IMMEDIATE IMPORT IN INCLUDING INCLUSIVE INCREMENT INCREMENTAL INDEX
+    INDEXED INDEXES INDICATOR INFINITE INITIALLY INLINE INNER INNTER INOUT
+    INPUT INSENSITIVE INSERT INSTEAD INT INTEGER INTERSECT INTERVAL INTO
+    INVALIDATE IS ISOLATION ITEM ITEMS ITERATE JOIN KEY KEYS LAG LANGUAGE
+    LARGE LAST LATERAL LEAD LEADING LEAVE LEFT LENGTH LESS LEVEL LIKE LIMIT
+    LIMITED LINES LIST LOAD LOCAL LOCALTIME LOCALTIMESTAMP LOCATION LOCATOR
+    LOCK LOCKS LOG LOGED LONG LOOP LOWER MAP MATCH MATERIALIZED MAX MAXLEN
+    MEMBER MERGE METHOD METRICS MIN MINUS MINUTE MISSING MOD MODE MODIFIES
+    MODIFY MODULE MONTH MULTI MULTISET NAME NAMES NATIONAL NATURAL NCHAR
+    NCLOB NEW NEXT NO NONE NOT NULL NULLIF NUMBER NUMERIC OBJECT OF OFFLINE
+    OFFSET OLD ON ONLINE ONLY OPAQUE OPEN OPERATOR OPTION OR ORDER
+    ORDINALITY OTHER OTHERS OUT OUTER OUTPUT OVER OVERLAPS OVERRIDE OWNER
+    PAD PARALLEL PARAMETER PARAMETERS PARTIAL PARTITION PARTITIONED
+    PARTITIONS PATH PERCENT PERCENTILE PERMISSION PERMISSIONS PIPE PIPELINED
+    PLAN POOL POSITION PRECISION PREPARE PRESERVE PRIMARY PRIOR PRIVATE
+    PRIVILEGES PROCEDURE PROCESSED PROJECT PROJECTION PROPERTY PROVISIONING
+    PUBLIC PUT QUERY QUIT QUORUM RAISE RANDOM RANGE RANK RAW READ READS REAL
+    REBUILD RECORD RECURSIVE REDUCE REF REFERENCE REFERENCES REFERENCING
+    REGEXP REGION REINDEX RELATIVE RELEASE REMAINDER RENAME REPEAT REPLACE
+    REQUEST RESET RESIGNAL RESOURCE RESPONSE RESTORE RESTRICT RESULT RETURN
+    RETURNING RETURNS REVERSE REVOKE RIGHT ROLE ROLES ROLLBACK ROLLUP
+    ROUTINE ROW ROWS RULE RULES SAMPLE SATISFIES SAVE SAVEPOINT SCAN SCHEMA
+    SCOPE SCROLL SEARCH SECOND SECTION SEGMENT SEGMENTS SELECT SELF SEMI
+    SENSITIVE SEPARATE SEQUENCE SERIALIZABLE SESSION SET SETS SHARD SHARE
+    SHARED SHORT SHOW SIGNAL SIMILAR SIZE SKEWED SMALLINT SNAPSHOT SOME
+    SOURCE SPACE SPACES SPARSE SPECIFIC SPECIFICTYPE SPLIT SQL SQLCODE
+    SQLERROR SQLEXCEPTION SQLSTATE SQLWARNING START STATE STATIC STATUS
+    STORAGE STORE STORED STREAM STRING STRUCT STYLE SUB SUBMULTISET
+    SUBPARTITION SUBSTRING SUBTYPE SUM SUPER SYMMETRIC SYNONYM SYSTEM TABLE
+    TABLESAMPLE TEMP TEMPORARY TERMINATED TEXT THAN THEN THROUGHPUT TIME
+    TIMESTAMP TIMEZONE TINYINT TO TOKEN TOTAL TOUCH TRAILING TRANSACTION
+    TRANSFORM TRANSLATE TRANSLATION TREAT TRIGGER TRIM TRUE TRUNCATE TTL
+    TUPLE TYPE UNDER UNDO UNION UNIQUE UNIT UNKNOWN UNLOGGED UNNEST
+    UNPROCESSED UNSIGNED UNTIL UPDATE UPPER URL USAGE USE USER USERS USING
+    UUID VACUUM VALUE VALUED VALUES VARCHAR VARIABLE VARIANCE VARINT VARYING
+    VIEW VIEWS VIRTUAL VOID WAIT WHEN WHENEVER WHERE WHILE WINDOW WITH
+    WITHIN WITHOUT WORK WRAPPED WRITE YEAR ZONE
+""".split())
+_PLAIN_NAME_RE = re.compile(r'[A-Za-z][A-Za-z0-9_]*\Z')
+
+# Shared, never mutated: returned as-is for every missing incident
+_NOT_FOUND = {'error': 'Incident not found'}
+
+# Analysis prompts, filled in with str.format_map by IncidentTools._build_prompt
+_ROOT_CAUSE_TMPL = """Analyze this IT incident and identify the most likely root cause:
+
+**Incident Details:**
+- ID: {incident_id}
+- Title: {title}
+- Description: {description}
+- Severity: {severity}
+- Affected Services: {services}
+- Current Status: {status}
+
+**Timeline:**
+{timeline}
+
+Provide:
+1. Top 3 most likely root causes (ranked by probability)
+2. Supporting evidence for each
+3. Next steps for verification
+4. Recommended remediation approach
+
+Be specific and actionable."""
+
+_IMPACT_TMPL = """Assess the impact of this IT incident:
+
+**Incident Details:**
+- Title: {title}
+- Description: {description}
+- Affected Services: {services}
+
+Provide:
+1. Immediate user/system impact
+2. Potential cascading effects
+3. Business impact assessment
+4. Affected stakeholders
+5. Recommended communication plan"""
+
+_SIMILAR_TMPL = """Find similar historical incidents:
+
+**Current Incident:**
+- Title: {title}
+- Description: {description}
+- Services: {services}
+
+Analyze patterns and provide:
+1. Similar incident patterns
+2. Common root causes
+3. Successful resolution strategies
+4. Prevention recommendations"""
+
+_PROMPT_TEMPLATES = {
+    'root_cause': _ROOT_CAUSE_TMPL,
+    'impact': _IMPACT_TMPL,
+    'similar_incidents': _SIMILAR_TMPL
+}
+
+# Output budget and sampling per analysis type; root cause runs cooler so the
+# diagnosis is more deterministic
+_MAX_TOKENS = {'root_cause': 2000, 'impact': 1200, 'similar_incidents': 1500}
+_TEMPERATURE = {'root_cause': 0.3}
+
+def _event_sort_key(event_ms: int) -> Decimal:
+    """Timeline sort key: epoch ms plus a random fraction, so events other
+    writers log for the same incident in the same millisecond don't overwrite"""
+    return Decimal(f"{event_ms}.{uuid.uuid4().int % 10**12:012d}")
 
 class IncidentTools:
     """Incident management tools"""
     
-    def create_incident(self, params: Dict) -> Dict:
+    __slots__ = ()
+    
+    @staticmethod
+    def create_incident(params: Dict) -> Dict:
         """Create a new incident"""
         try:
-            incident_id = f"INC-{uuid.uuid4().hex[:8].upper()}"
-            timestamp = int(datetime.now().timestamp())
+            timestamp = int(time.time())
+            incident = IncidentTools._build_incident(params, timestamp)
+            incident_id = incident['incident_id']
+            
+            ddb.put_item(
+                TableName=incidents_table.name,
+                Item={
+                    'incident_id': {'S': incident_id},
+                    'created_at': {'N': str(timestamp)},
+                    'created_date': {'S': incident['created_date']},
+                    'title': {'S': incident['title']},
+                    'description': {'S': incident['description']},
+                    'severity': {'S': incident['severity']},
+                    'status': {'S': 'open'},
+                    'status_severity': {'S': incident['status_severity']},
+                    'affected_services': _serialize(incident['affected_services']),
+                    'detected_by': {'S': incident['detected_by']},
+                    'assigned_to': {'S': incident['assigned_to']},
+                    'timeline': {'L': [{'M': {
+                        'timestamp': {'N': str(timestamp)},
+                        'event': {'S': 'incident_created'},
+                        'actor': {'S': incident['detected_by']},
+                        'details': {'S': 'Incident created in system'}
+                    }}]},
+                    'metadata': _serialize(incident['metadata'])
+                }
+            )
             
-            incident = {
+            return {
+                'success': True,
                 'incident_id': incident_id,
-                'created_at': timestamp,
-                'title': params['title'],
-                'description': params['description'],
-                'severity': params.get('severity', 'medium'),
-                'status': 'open',
-                'affected_services': params.get('affected_services', []),
-                'detected_by': params.get('detected_by', 'system'),
-                'assigned_to': params.get('assigned_to', 'unassigned'),
-                'timeline': [
-                    {
-                        'timestamp': timestamp,
-                        'event': 'incident_created',
-                        'actor': params.get('detected_by', 'system'),
-                        'details': 'Incident created in system'
-                    }
-                ],
-                'metadata': params.get('metadata', {})
+                'incident': incident
             }
+        
+        except Exception as e:
+            return {'error': str(e)}
+    
+    @staticmethod
+    def create_incidents_bulk(params: Dict) -> Dict:
+        """Create several incidents with batched writes"""
+        try:
+            incidents_params = params.get('incidents') or []
+            if not incidents_params:
+                return {'error': 'No incidents provided'}
+            
+            timestamp = int(time.time())
+            incidents = [IncidentTools._build_incident(p, timestamp) for p in incidents_params]
             
-            incidents_table.put_item(Item=incident)
+            # batch_writer sends up to 25 puts per BatchWriteItem and resends unprocessed items
+            with incidents_table.batch_writer() as batch:
+                for incident in incidents:
+                    batch.put_item(Item=incident)
             
             return {
                 'success': True,
-                'incident_id': incident_id,
-                'incident': incident
+                'incident_ids': [incident['incident_id'] for incident in incidents],
+                'count': len(incidents)
             }
         
         except Exception as e:
             return {'error': str(e)}
     
-    def get_incident(self, params: Dict) -> Dict:
+    @staticmethod
+    def _build_incident(params: Dict, timestamp: int) -> Dict:
+        """Build a new open incident item from tool parameters"""
+        severity = params.get('severity', 'medium')
+        return {
+            'incident_id': f"INC-{uuid.uuid4().hex[:8].upper()}",
+            'created_at': timestamp,
+            'created_date': time.strftime('%Y-%m-%d', time.gmtime(timestamp)),
+            'title': params['title'],
+            'description': params['description'],
+            'severity': severity,
+            'status': 'open',
+            'status_severity': f"open#{severity}",
+            'affected_services': params.get('affected_services', []),
+            'detected_by': params.get('detected_by', 'system'),
+            'assigned_to': params.get('assigned_to', 'unassigned'),
+            'timeline': [
+                {
+                    'timestamp': timestamp,
+                    'event': 'incident_created',
+                    'actor': params.get('detected_by', 'system'),
+                    'details': 'Incident created in system'
+                }
+            ],
+            'metadata': params.get('metadata', {})
+        }
+    
+    @staticmethod
+    def get_incident(params: Dict) -> Dict:
         """Get incident details"""
         try:
             incident_id = params['incident_id']
             
-            response = incidents_table.query(
+            response = ddb.query(
+                TableName=incidents_table.name,
                 KeyConditionExpression='incident_id = :id',
-                ExpressionAttributeValues={':id': incident_id}
+                ExpressionAttributeValues={':id': {'S': incident_id}},
+                Limit=1
             )
             
             items = response.get('Items', [])
             
             if not items:
-                return {'error': 'Incident not found'}
+                return _NOT_FOUND
             
             return {
                 'success': True,
-                'incident': items[0]
+                'incident': {key: _deserialize(value) for key, value in items[0].items()}
             }
         
         except Exception as e:
             return {'error': str(e)}
     
-    def update_incident(self, params: Dict) -> Dict:
+    @staticmethod
+    def update_incident(params: Dict) -> Dict:
         """Update incident status"""
         try:
             incident_id = params['incident_id']
             updates = params.get('updates', {})
             updated_by = params.get('updated_by', 'system')
             
-            # Get current incident
-            incident_response = self.get_incident({'incident_id': incident_id})
-            if 'error' in incident_response:
-                return incident_response
-            
-            incident = incident_response['incident']
-            created_at = incident['created_at']
+            # created_at is returned by create/list; only look it up if missing
+            created_at = params.get('created_at')
+            if created_at is None:
+                response = incidents_table.query(
+                    KeyConditionExpression='incident_id = :id',
+                    ExpressionAttributeValues={':id': incident_id},
+                    ProjectionExpression='created_at',
+                    Limit=1
+                )
+                items = response.get('Items', [])
+                if not items:
+                    return _NOT_FOUND
+                created_at = items[0]['created_at']
             
             # Prepare update expression
             update_expression_parts = []
@@ -100,147 +362,98 @@ class IncidentTools:
             expression_names = {}
             
             for key, value in updates.items():
-                if key not in ['incident_id', 'created_at', 'timeline']:
-                    update_expression_parts.append(f"#{key} = :{key}")
+                if key not in ['incident_id', 'created_at', 'timeline', 'status_severity']:
+                    if key.upper() in _DDB_RESERVED or not _PLAIN_NAME_RE.match(key):
+                        update_expression_parts.append(f"#{key} = :{key}")
+                        expression_names[f"#{key}"] = key
+                    else:
+                        update_expression_parts.append(f"{key} = :{key}")
                     expression_values[f":{key}"] = value
-                    expression_names[f"#{key}"] = key
-            
-            # Add timeline entry
-            timeline_entry = {
-                'timestamp': int(datetime.now().timestamp()),
-                'event': 'incident_updated',
-                'actor': updated_by,
-                'details': f"Updated: {', '.join(updates.keys())}"
-            }
             
-            update_expression_parts.append("timeline = list_append(timeline, :new_event)")
-            expression_values[':new_event'] = [timeline_entry]
+            if not update_expression_parts:
+                return {'error': 'No updatable fields provided'}
+            
+            # Keep the status-severity-index key in step with either field
+            if 'status' in updates or 'severity' in updates:
+                current = {}
+                if 'status' not in updates or 'severity' not in updates:
+                    current = incidents_table.get_item(
+                        Key={'incident_id': incident_id, 'created_at': int(created_at)},
+                        ProjectionExpression='#status, severity',
+                        ExpressionAttributeNames={'#status': 'status'}
+                    ).get('Item', {})
+                status = updates.get('status', current.get('status'))
+                severity = updates.get('severity', current.get('severity', 'medium'))
+                update_expression_parts.append("status_severity = :status_severity")
+                expression_values[':status_severity'] = f"{status}#{severity}"
             
             update_expression = "SET " + ", ".join(update_expression_parts)
             
-            incidents_table.update_item(
-                Key={
-                    'incident_id': incident_id,
-                    'created_at': created_at
-                },
-                UpdateExpression=update_expression,
-                ExpressionAttributeNames=expression_names if expression_names else None,
-                ExpressionAttributeValues=expression_values
-            )
+            update_kwargs = {}
+            if expression_names:
+                update_kwargs['ExpressionAttributeNames'] = expression_names
+            
+            try:
+                response = incidents_table.update_item(
+                    Key={
+                        'incident_id': incident_id,
+                        'created_at': int(created_at)
+                    },
+                    UpdateExpression=update_expression,
+                    ConditionExpression='attribute_exists(incident_id)',
+                    ExpressionAttributeValues=expression_values,
+                    ReturnValues='UPDATED_NEW',
+                    **update_kwargs
+                )
+            except incidents_table.meta.client.exceptions.ConditionalCheckFailedException:
+                return _NOT_FOUND
+            
+            timeline_table.put_item(Item=IncidentTools._timeline_item(
+                incident_id,
+                int(time.time() * 1000),
+                'incident_updated',
+                updated_by,
+                f"Updated: {', '.join(updates.keys())}"
+            ))
             
             return {
                 'success': True,
                 'incident_id': incident_id,
-                'updated_fields': list(updates.keys())
+                'updated_fields': list(updates.keys()),
+                'attributes': response.get('Attributes', {})
             }
         
         except Exception as e:
             return {'error': str(e)}
     
-    def analyze_incident(self, params: Dict) -> Dict:
+    @staticmethod
+    def analyze_incident(params: Dict) -> Dict:
         """AI-powered incident analysis"""
         try:
             incident_id = params['incident_id']
             analysis_type = params.get('analysis_type', 'root_cause')
             
             # Get incident
-            incident_response = self.get_incident({'incident_id': incident_id})
+            incident_response = IncidentTools.get_incident({'incident_id': incident_id})
             if 'error' in incident_response:
                 return incident_response
             
             incident = incident_response['incident']
             
-            # Build analysis prompt
-            if analysis_type == 'root_cause':
-                prompt = f"""Analyze this IT incident and identify the most likely root cause:
-
-**Incident Details:**
-- ID: {incident['incident_id']}
-- Title: {incident['title']}
-- Description: {incident['description']}
-- Severity: {incident['severity']}
-- Affected Services: {', '.join(incident.get('affected_services', ['Unknown']))}
-- Current Status: {incident['status']}
-
-**Timeline:**
-{self._format_timeline(incident.get('timeline', []))}
-
-Provide:
-1. Top 3 most likely root causes (ranked by probability)
-2. Supporting evidence for each
-3. Next steps for verification
-4. Recommended remediation approach
-
-Be specific and actionable."""
-
-            elif analysis_type == 'impact':
-                prompt = f"""Assess the impact of this IT incident:
-
-**Incident Details:**
-- Title: {incident['title']}
-- Description: {incident['description']}
-- Affected Services: {', '.join(incident.get('affected_services', ['Unknown']))}
-
-Provide:
-1. Immediate user/system impact
-2. Potential cascading effects
-3. Business impact assessment
-4. Affected stakeholders
-5. Recommended communication plan"""
-
-            elif analysis_type == 'similar_incidents':
-                prompt = f"""Find similar historical incidents:
-
-**Current Incident:**
-- Title: {incident['title']}
-- Description: {incident['description']}
-- Services: {', '.join(incident.get('affected_services', []))}
-
-Analyze patterns and provide:
-1. Similar incident patterns
-2. Common root causes
-3. Successful resolution strategies
-4. Prevention recommendations"""
-            
-            else:
+            prompt = IncidentTools._build_prompt(incident, analysis_type)
+            if prompt is None:
                 return {'error': f'Unknown analysis type: {analysis_type}'}
             
-            # Call Bedrock
-            response = bedrock_runtime.invoke_model(
-                modelId='anthropic.claude-3-5-sonnet-20241022-v2:0',
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 2000,
-                    "temperature": 0.7,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ]
-                })
-            )
+            analysis = IncidentTools._invoke_model(prompt, analysis_type)
             
-            response_body = json.loads(response['body'].read())
-            analysis = response_body['content'][0]['text']
-            
-            # Update incident with analysis
-            created_at = incident['created_at']
-            incidents_table.update_item(
-                Key={
-                    'incident_id': incident_id,
-                    'created_at': created_at
-                },
-                UpdateExpression='SET timeline = list_append(timeline, :new_event)',
-                ExpressionAttributeValues={
-                    ':new_event': [{
-                        'timestamp': int(datetime.now().timestamp()),
-                        'event': f'ai_analysis_{analysis_type}',
-                        'actor': 'ai_agent',
-                        'details': analysis
-                    }]
-                }
-            )
+            # Record the analysis on the incident timeline
+            timeline_table.put_item(Item=IncidentTools._timeline_item(
+                incident_id,
+                int(time.time() * 1000),
+                f'ai_analysis_{analysis_type}',
+                'ai_agent',
+                analysis
+            ))
             
             return {
                 'success': True,
@@ -252,30 +465,89 @@ Analyze patterns and provide:
         except Exception as e:
             return {'error': str(e)}
     
-    def list_incidents(self, params: Dict) -> Dict:
+    @staticmethod
+    def analyze_incident_multi(params: Dict) -> Dict:
+        """Run several AI analyses of one incident concurrently"""
+        try:
+            incident_id = params['incident_id']
+            analysis_types = list(dict.fromkeys(
+                params.get('analysis_types') or ['root_cause', 'impact', 'similar_incidents']
+            ))
+            
+            incident_response = IncidentTools.get_incident({'incident_id': incident_id})
+            if 'error' in incident_response:
+                return incident_response
+            
+            incident = incident_response['incident']
+            
+            prompts = {}
+            for analysis_type in analysis_types:
+                prompt = IncidentTools._build_prompt(incident, analysis_type)
+                if prompt is None:
+                    return {'error': f'Unknown analysis type: {analysis_type}'}
+                prompts[analysis_type] = prompt
+            
+            futures = {
+                analysis_type: _analysis_pool.submit(IncidentTools._invoke_model, prompt, analysis_type)
+                for analysis_type, prompt in prompts.items()
+            }
+            analyses = {analysis_type: future.result() for analysis_type, future in futures.items()}
+            
+            # One BatchWriteItem for every analysis
+            now_ms = int(time.time() * 1000)
+            with timeline_table.batch_writer() as batch:
+                for analysis_type, analysis in analyses.items():
+                    batch.put_item(Item=IncidentTools._timeline_item(
+                        incident_id,
+                        now_ms,
+                        f'ai_analysis_{analysis_type}',
+                        'ai_agent',
+                        analysis
+                    ))
+            
+            return {
+                'success': True,
+                'analyses': analyses,
+                'incident_id': incident_id
+            }
+        
+        except Exception as e:
+            return {'error': str(e)}
+    
+    @staticmethod
+    def list_incidents(params: Dict) -> Dict:
         """List incidents with filters"""
         try:
             status = params.get('status')
             severity = params.get('severity')
-            limit = params.get('limit', 20)
+            limit = int(params.get('limit', 20))
             
-            if status:
-                response = incidents_table.query(
-                    IndexName='status-index',
-                    KeyConditionExpression='#status = :status',
-                    ExpressionAttributeNames={'#status': 'status'},
-                    ExpressionAttributeValues={':status': status},
-                    Limit=limit,
-                    ScanIndexForward=False
-                )
+            if status and severity:
+                incidents = IncidentTools._query_newest({
+                    'IndexName': 'status-severity-index',
+                    'KeyConditionExpression': 'status_severity = :status_severity',
+                    'ExpressionAttributeValues': {':status_severity': f"{status}#{severity}"}
+                }, None, limit)
+            elif status:
+                incidents = IncidentTools._query_newest({
+                    'IndexName': 'status-index',
+                    'KeyConditionExpression': '#status = :status',
+                    'ExpressionAttributeNames': {'#status': 'status'},
+                    'ExpressionAttributeValues': {':status': status}
+                }, None, limit)
             else:
-                response = incidents_table.scan(Limit=limit)
-            
-            incidents = response.get('Items', [])
-            
-            # Filter by severity if specified
-            if severity:
-                incidents = [i for i in incidents if i.get('severity') == severity]
+                # Walk the daily created_date buckets back from today
+                incidents = []
+                day = datetime.now(timezone.utc).date()
+                for _ in range(LIST_LOOKBACK_DAYS):
+                    incidents.extend(IncidentTools._query_newest({
+                        'IndexName': 'created-date-index',
+                        'KeyConditionExpression': 'created_date = :day',
+                        'ExpressionAttributeValues': {':day': day.isoformat()}
+                    }, severity, limit - len(incidents)))
+                    if len(incidents) >= limit:
+                        break
+                    day -= timedelta(days=1)
             
             return {
                 'success': True,
@@ -286,96 +558,213 @@ Analyze patterns and provide:
         except Exception as e:
             return {'error': str(e)}
     
-    def _format_timeline(self, timeline):
-        """Format timeline for display"""
+    @staticmethod
+    def _query_newest(query_kwargs: Dict, severity, limit: int) -> list:
+        """Query an index newest-first, filtering on severity server-side"""
+        query_kwargs = dict(query_kwargs, ScanIndexForward=False)
+        if severity:
+            query_kwargs['FilterExpression'] = '#severity = :severity'
+            query_kwargs['ExpressionAttributeNames'] = {
+                **query_kwargs.get('ExpressionAttributeNames', {}), '#severity': 'severity'
+            }
+            query_kwargs['ExpressionAttributeValues'] = {
+                **query_kwargs['ExpressionAttributeValues'], ':severity': severity
+            }
+        
+        # Limit counts items read before the filter, so keep paging until filled
+        items = []
+        while len(items) < limit:
+            response = incidents_table.query(Limit=limit - len(items), **query_kwargs)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return items
+    
+    @staticmethod
+    def _build_prompt(incident: Dict, analysis_type: str):
+        """Build the Claude prompt for an analysis type, or None if unknown"""
+        template = _PROMPT_TEMPLATES.get(analysis_type)
+        if template is None:
+            return None
+        
+        return template.format_map({
+            'incident_id': incident['incident_id'],
+            'title': incident['title'],
+            'description': incident['description'],
+            'severity': incident['severity'],
+            'status': incident['status'],
+            'services': ', '.join(incident.get('affected_services') or ('Unknown',)),
+            'timeline': IncidentTools._format_timeline(incident) if '{timeline}' in template else ''
+        })
+    
+    @staticmethod
+    def _invoke_model(prompt: str, analysis_type: str) -> str:
+        """Stream a prompt's completion from Claude and return the full text"""
+        response = bedrock_runtime.invoke_model_with_response_stream(
+            modelId=BEDROCK_MODEL_ID,
+            body=_dumps({
+                "anthropic_version": "bedrock-2023-05-31",
+                "max_tokens": _MAX_TOKENS.get(analysis_type, 1500),
+                "temperature": _TEMPERATURE.get(analysis_type, 0.7),
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ]
+            }),
+            **_INVOKE_OPTIONS
+        )
+        
+        text_parts = []
+        for event in response['body']:
+            chunk = event.get('chunk')
+            if chunk is None:
+                continue
+            payload = _loads(chunk['bytes'])
+            if payload.get('type') == 'content_block_delta':
+                text_parts.append(payload['delta'].get('text', ''))
+        
+        return ''.join(text_parts)
+    
+    @staticmethod
+    def _timeline_item(incident_id: str, event_ms: int, event: str, actor: str, details) -> Dict:
+        """Build an ITOps-IncidentTimeline item"""
+        return {
+            'incident_id': incident_id,
+            'event_ts': _event_sort_key(event_ms),
+            'timestamp': event_ms // 1000,
+            'event': event,
+            'actor': actor,
+            'details': details
+        }
+    
+    @staticmethod
+    def _format_timeline(incident: Dict):
+        """Format the last 5 timeline events for display"""
+        response = timeline_table.query(
+            KeyConditionExpression='incident_id = :id',
+            ExpressionAttributeValues={':id': incident['incident_id']},
+            ScanIndexForward=False,
+            Limit=5
+        )
+        
+        # Other writers still append to the incident's embedded timeline list
+        events = sorted(
+            chain(incident.get('timeline', [])[-5:], response.get('Items', [])),
+            key=lambda event: event['timestamp']
+        )
+        
         formatted = []
-        for event in timeline[-5:]:  # Last 5 events
-            ts = datetime.fromtimestamp(event['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+        for event in events[-5:]:
+            ts = datetime.fromtimestamp(int(event['timestamp'])).strftime('%Y-%m-%d %H:%M:%S')
             formatted.append(f"- {ts}: {event['event']} - {event.get('details', '')}")
         return '\n'.join(formatted)
 
+_DISPATCH = {
+    'create_incident': IncidentTools.create_incident,
+    'create_incidents_bulk': IncidentTools.create_incidents_bulk,
+    'get_incident': IncidentTools.get_incident,
+    'update_incident': IncidentTools.update_incident,
+    'analyze_incident': IncidentTools.analyze_incident,
+    'analyze_incident_multi': IncidentTools.analyze_incident_multi,
+    'list_incidents': IncidentTools.list_incidents
+}
+
+# list_tools never changes, so build the response once
+_TOOLS_RESPONSE = {
+    'statusCode': 200,
+    'tools': [
+        {
+            'name': 'create_incident',
+            'description': 'Create a new incident',
+            'parameters': {
+                'title': 'Incident title',
+                'description': 'Detailed description',
+                'severity': 'critical, high, medium, or low',
+                'affected_services': 'List of affected services',
+                'detected_by': 'Who detected the incident'
+            }
+        },
+        {
+            'name': 'create_incidents_bulk',
+            'description': 'Create several incidents in one call',
+            'parameters': {
+                'incidents': 'List of incidents, each with the create_incident parameters'
+            }
+        },
+        {
+            'name': 'get_incident',
+            'description': 'Get incident details',
+            'parameters': {
+                'incident_id': 'Incident ID'
+            }
+        },
+        {
+            'name': 'update_incident',
+            'description': 'Update incident status or details',
+            'parameters': {
+                'incident_id': 'Incident ID',
+                'created_at': 'Incident created_at (optional, skips the lookup)',
+                'updates': 'Dictionary of fields to update',
+                'updated_by': 'Who is updating'
+            }
+        },
+        {
+            'name': 'analyze_incident',
+            'description': 'AI-powered incident analysis',
+            'parameters': {
+                'incident_id': 'Incident ID',
+                'analysis_type': 'root_cause, impact, or similar_incidents'
+            }
+        },
+        {
+            'name': 'analyze_incident_multi',
+            'description': 'Run several AI analyses of an incident in parallel',
+            'parameters': {
+                'incident_id': 'Incident ID',
+                'analysis_types': 'List of root_cause, impact, similar_incidents (default: all)'
+            }
+        },
+        {
+            'name': 'list_incidents',
+            'description': 'List incidents with optional filters',
+            'parameters': {
+                'status': 'Filter by status',
+                'severity': 'Filter by severity',
+                'limit': 'Maximum number of results'
+            }
+        }
+    ]
+}
+
 def lambda_handler(event, context):
     """MCP Incident Management Handler"""
     
-    print(f"Received event: {json.dumps(event)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Received event: %s", _dumps(event, default=str).decode())
     
     try:
-        tools = IncidentTools()
         action = event.get('action', 'execute')
         
         if action == 'list_tools':
-            return {
-                'statusCode': 200,
-                'tools': [
-                    {
-                        'name': 'create_incident',
-                        'description': 'Create a new incident',
-                        'parameters': {
-                            'title': 'Incident title',
-                            'description': 'Detailed description',
-                            'severity': 'critical, high, medium, or low',
-                            'affected_services': 'List of affected services',
-                            'detected_by': 'Who detected the incident'
-                        }
-                    },
-                    {
-                        'name': 'get_incident',
-                        'description': 'Get incident details',
-                        'parameters': {
-                            'incident_id': 'Incident ID'
-                        }
-                    },
-                    {
-                        'name': 'update_incident',
-                        'description': 'Update incident status or details',
-                        'parameters': {
-                            'incident_id': 'Incident ID',
-                            'updates': 'Dictionary of fields to update',
-                            'updated_by': 'Who is updating'
-                        }
-                    },
-                    {
-                        'name': 'analyze_incident',
-                        'description': 'AI-powered incident analysis',
-                        'parameters': {
-                            'incident_id': 'Incident ID',
-                            'analysis_type': 'root_cause, impact, or similar_incidents'
-                        }
-                    },
-                    {
-                        'name': 'list_incidents',
-                        'description': 'List incidents with optional filters',
-                        'parameters': {
-                            'status': 'Filter by status',
-                            'severity': 'Filter by severity',
-                            'limit': 'Maximum number of results'
-                        }
-                    }
-                ]
-            }
+            return _TOOLS_RESPONSE
         
         elif action == 'execute':
             tool_name = event.get('tool_name')
             parameters = event.get('parameters', {})
             
-            if tool_name == 'create_incident':
-                result = tools.create_incident(parameters)
-            elif tool_name == 'get_incident':
-                result = tools.get_incident(parameters)
-            elif tool_name == 'update_incident':
-                result = tools.update_incident(parameters)
-            elif tool_name == 'analyze_incident':
-                result = tools.analyze_incident(parameters)
-            elif tool_name == 'list_incidents':
-                result = tools.list_incidents(parameters)
-            else:
+            handler = _DISPATCH.get(tool_name)
+            if handler is None:
                 return {'statusCode': 400, 'error': f'Unknown tool: {tool_name}'}
             
+            result = handler(parameters)
             return {'statusCode': 200, 'result': result}
         
         else:
             return {'statusCode': 400, 'error': f'Unknown action: {action}'}
     
     except Exception as e:
-        print(f"Error: {e}")
+        logger.exception("Handler failed")
         return {'statusCode': 500, 'error': str(e)}
\ No newline at end of file
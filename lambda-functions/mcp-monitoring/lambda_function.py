@@ -4,75 +4,219 @@ Provides CloudWatch metrics and logs access to AI agents
 """
 
 import json
+import logging
+import os
+import time
 import boto3
-from datetime import datetime, timedelta
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 from typing import Dict, Any
 
-# Initialize AWS clients
-cloudwatch = boto3.client('cloudwatch')
-logs = boto3.client('logs')
-dynamodb = boto3.resource('dynamodb')
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:  # orjson missing from the package; fall back to stdlib
+    def _dumps(obj, default=None):
+        return json.dumps(obj, default=default).encode()
 
-# Circuit Breaker Table for fault tolerance
-circuit_breaker_table = dynamodb.Table('ITOps-CircuitBreaker')
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
+# Initialize AWS clients; keep-alive connections are reused across warm invocations
+_CFG = Config(
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=10,
+    retries={'max_attempts': 2, 'mode': 'standard'}
+)
+cloudwatch = boto3.client('cloudwatch', config=_CFG)
+logs = boto3.client('logs', config=_CFG)
+dynamodb = boto3.resource('dynamodb', config=_CFG)
+
+# Circuit Breaker Table for fault tolerance. Every tool call reads it by key,
+# so an optional DAX cluster serves those reads; writes pass through to DynamoDB.
+DAX_ENDPOINT = os.environ.get('DAX_ENDPOINT')
+
+if DAX_ENDPOINT:
+    from amazondax import AmazonDaxClient
+    dax = AmazonDaxClient.resource(endpoint_url=DAX_ENDPOINT)
+    circuit_breaker_table = dax.Table('ITOps-CircuitBreaker')
+else:
+    circuit_breaker_table = dynamodb.Table('ITOps-CircuitBreaker')
+
+# Resolve credentials and open each client's connection during init rather
+# than on the first invocation. Set LAMBDA_WARMUP=0 to skip (e.g. locally).
+if os.environ.get('LAMBDA_WARMUP', '1') == '1':
+    for _warm in (
+        lambda: cloudwatch.list_metrics(
+            Namespace='AWS/Lambda',
+            Dimensions=[{'Name': 'FunctionName', 'Value': '__warmup__'}]
+        ),
+        lambda: logs.describe_log_groups(limit=1),
+        lambda: circuit_breaker_table.get_item(Key={'service_name': '__warmup__'})
+    ):
+        try:
+            _warm()
+        except Exception as e:
+            logger.warning("Warmup call failed: %s", e)
+
+# Most datapoints a single get_metric_statistics response may hold
+MAX_DATAPOINTS = 1440
+
+_EPOCH = datetime(1970, 1, 1)
+
+def _fmt_ts(ms: int) -> str:
+    """ISO-format a CloudWatch Logs epoch-ms timestamp (UTC, naive)"""
+    return (_EPOCH + timedelta(milliseconds=ms)).isoformat()
+
+# Per-container cache of breaker items: service_name -> (monotonic time, item).
+# DynamoDB stays authoritative; a second of staleness is acceptable for a breaker.
+CB_CACHE_TTL = 1.0
+_CB_CACHE = {}
+
+# Recent check_service_health results: service_name -> (monotonic time, result)
+HEALTH_CACHE_TTL = 30.0
+HEALTH_CACHE_SIZE = 128
+_HEALTH_CACHE = {}
+
+# Health rules: (metric, threshold, status, issue). Rows for the same metric
+# are ordered strictest first and only the first one exceeded applies.
+HEALTH_THRESHOLDS = (
+    ('error_count', 10, 'unhealthy', 'High error rate: {} errors in past hour'),
+    ('error_count', 5, 'degraded', 'Elevated error rate: {} errors'),
+    ('avg_duration_ms', 5000, 'degraded', 'High average latency: {}ms'),
+    ('max_duration_ms', 10000, 'degraded', 'Peak latency spike: {}ms')
+)
+HEALTH_SEVERITY = ('healthy', 'degraded', 'unhealthy')
+
+# Runs independent CloudWatch/Logs calls side by side
+_POOL = ThreadPoolExecutor(max_workers=4)
+
+# Breaker writes run on _POOL off the request path; the handler gives them
+# this long to land before returning (anything still in flight finishes
+# when the container thaws for its next invocation)
+BREAKER_DRAIN_TIMEOUT = 0.1
+_PENDING_WRITES = []
+
+def _drain_breaker_writes():
+    """Wait briefly for outstanding breaker writes, forgetting finished ones"""
+    if _PENDING_WRITES:
+        wait(_PENDING_WRITES, timeout=BREAKER_DRAIN_TIMEOUT)
+        _PENDING_WRITES[:] = [f for f in _PENDING_WRITES if not f.done()]
+
+@dataclass(frozen=True, slots=True)
 class CircuitBreaker:
     """
     Circuit breaker pattern implementation
     Prevents cascading failures by temporarily blocking calls to failing services
+    All breaker state lives in DynamoDB; instances only carry configuration
     """
     
-    def __init__(self, service_name: str, failure_threshold: int = 5, timeout: int = 60):
-        self.service_name = service_name
-        self.failure_threshold = failure_threshold
-        self.timeout = timeout
+    service_name: str
+    failure_threshold: int = 5
+    timeout: int = 60
+    # The item TTLs sit well above how often a service is polled, so an
+    # idle-but-healthy breaker item isn't expired between calls and
+    # re-created on the next one. The failure TTL never drops below timeout,
+    # or an OPEN breaker could be deleted before its half-open window.
+    success_ttl: int = 900
+    failure_ttl: int = 180
     
     def get_state(self) -> Dict:
-        """Get current circuit breaker state from DynamoDB"""
+        """Get current circuit breaker state (local cache, then DynamoDB)"""
+        cached = _CB_CACHE.get(self.service_name)
+        if cached and time.monotonic() - cached[0] < CB_CACHE_TTL:
+            return cached[1]
+        
         try:
             response = circuit_breaker_table.get_item(Key={'service_name': self.service_name})
-            return response.get('Item', {
+            item = response.get('Item', {
                 'service_name': self.service_name,
                 'state': 'CLOSED',
                 'failure_count': 0,
                 'last_failure_time': 0
             })
+            _CB_CACHE[self.service_name] = (time.monotonic(), item)
+            return item
         except Exception as e:
             print(f"Error getting circuit breaker state: {e}")
             return {'service_name': self.service_name, 'state': 'CLOSED', 'failure_count': 0}
     
     def record_success(self):
-        """Record successful call - resets circuit breaker"""
+        """Record successful call - resets circuit breaker (written asynchronously)"""
+        now = int(time.time())
+        item = {
+            'service_name': self.service_name,
+            'state': 'CLOSED',
+            'failure_count': 0,
+            'last_success_time': now,
+            'ttl': now + self.success_ttl
+        }
+        _CB_CACHE[self.service_name] = (time.monotonic(), item)
+        _PENDING_WRITES.append(_POOL.submit(self._write_success, item))
+    
+    def _write_success(self, item: Dict):
         try:
-            circuit_breaker_table.put_item(
-                Item={
-                    'service_name': self.service_name,
-                    'state': 'CLOSED',
-                    'failure_count': 0,
-                    'last_success_time': int(datetime.now().timestamp()),
-                    'ttl': int(datetime.now().timestamp()) + 300
-                }
-            )
+            circuit_breaker_table.put_item(Item=item)
         except Exception as e:
+            _CB_CACHE.pop(self.service_name, None)
             print(f"Error recording success: {e}")
     
     def record_failure(self):
-        """Record failed call - may open circuit"""
-        state = self.get_state()
-        failure_count = state.get('failure_count', 0) + 1
-        new_state = 'OPEN' if failure_count >= self.failure_threshold else 'CLOSED'
+        """Record failed call - may open circuit (written asynchronously)"""
+        _PENDING_WRITES.append(_POOL.submit(self._write_failure))
+    
+    def _write_failure(self):
+        now = int(time.time())
         
         try:
-            circuit_breaker_table.put_item(
-                Item={
-                    'service_name': self.service_name,
-                    'state': new_state,
-                    'failure_count': failure_count,
-                    'last_failure_time': int(datetime.now().timestamp()),
-                    'ttl': int(datetime.now().timestamp()) + self.timeout
-                }
+            # Atomic increment; concurrent failures can't overwrite each other's count
+            response = circuit_breaker_table.update_item(
+                Key={'service_name': self.service_name},
+                UpdateExpression='''
+                    ADD failure_count :one
+                    SET last_failure_time = :now,
+                        #state = if_not_exists(#state, :closed),
+                        #ttl = :ttl
+                ''',
+                ExpressionAttributeNames={'#state': 'state', '#ttl': 'ttl'},
+                ExpressionAttributeValues={
+                    ':one': 1,
+                    ':now': now,
+                    ':closed': 'CLOSED',
+                    ':ttl': now + max(self.failure_ttl, self.timeout)
+                },
+                ReturnValues='ALL_NEW'
             )
+            item = response['Attributes']
+            
+            if item['state'] != 'OPEN' and item['failure_count'] >= self.failure_threshold:
+                # Re-checked server-side in case a success reset the count meanwhile
+                response = circuit_breaker_table.update_item(
+                    Key={'service_name': self.service_name},
+                    UpdateExpression='SET #state = :open',
+                    ConditionExpression='failure_count >= :threshold',
+                    ExpressionAttributeNames={'#state': 'state'},
+                    ExpressionAttributeValues={
+                        ':open': 'OPEN',
+                        ':threshold': self.failure_threshold
+                    },
+                    ReturnValues='ALL_NEW'
+                )
+                item = response['Attributes']
+            
+            _CB_CACHE[self.service_name] = (time.monotonic(), item)
+        except ClientError as e:
+            _CB_CACHE.pop(self.service_name, None)
+            # ConditionalCheckFailed: a concurrent success reset the breaker
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                print(f"Error recording failure: {e}")
         except Exception as e:
+            _CB_CACHE.pop(self.service_name, None)
             print(f"Error recording failure: {e}")
     
     def is_open(self) -> bool:
@@ -80,9 +224,9 @@ class CircuitBreaker:
         state = self.get_state()
         
         if state.get('state') == 'OPEN':
-            last_failure = state.get('last_failure_time', 0)
+            last_failure = int(state.get('last_failure_time', 0))
             # Half-open after timeout
-            if datetime.now().timestamp() - last_failure > self.timeout:
+            if time.time() - last_failure > self.timeout:
                 return False
             return True
         
@@ -94,6 +238,12 @@ class MCPTools:
     def __init__(self):
         self.cloudwatch_breaker = CircuitBreaker('cloudwatch')
         self.logs_breaker = CircuitBreaker('cloudwatch_logs')
+        # tool_name -> bound method, resolved once instead of per request
+        self._dispatch = {
+            'get_cpu_metrics': self.get_cpu_metrics,
+            'get_error_logs': self.get_error_logs,
+            'check_service_health': self.check_service_health
+        }
     
     def get_cpu_metrics(self, params: Dict) -> Dict:
         """
@@ -131,8 +281,13 @@ class MCPTools:
                 dimensions = [{'Name': 'InstanceId', 'Value': resource_id}]
             
             # Calculate time range
-            end_time = datetime.now()
-            start_time = end_time - timedelta(hours=hours)
+            now = time.time()
+            end_time = datetime.fromtimestamp(now, tz=timezone.utc)
+            start_time = datetime.fromtimestamp(now - hours * 3600, tz=timezone.utc)
+            
+            # get_metric_statistics has no paging and caps a response at 1440
+            # datapoints, so widen the 5 minute period for long windows
+            period = max(300, -(-int(hours * 3600) // (MAX_DATAPOINTS * 60)) * 60)
             
             # Get metrics from CloudWatch
             response = cloudwatch.get_metric_statistics(
@@ -141,7 +296,7 @@ class MCPTools:
                 Dimensions=dimensions,
                 StartTime=start_time,
                 EndTime=end_time,
-                Period=300,  # 5 minute intervals
+                Period=period,
                 Statistics=['Average', 'Maximum']
             )
             
@@ -151,21 +306,31 @@ class MCPTools:
             # Process and return results
             datapoints = sorted(response['Datapoints'], key=lambda x: x['Timestamp'])
             
+            # One pass builds the output and the summary totals
+            points = []
+            total = 0.0
+            peak = 0
+            for dp in datapoints:
+                average = dp['Average']
+                maximum = dp['Maximum']
+                total += average
+                if maximum > peak:
+                    peak = maximum
+                points.append({
+                    'timestamp': dp['Timestamp'].isoformat(),
+                    'average': average,
+                    'maximum': maximum
+                })
+            
             return {
                 'resource_id': resource_id,
                 'resource_type': resource_type,
                 'metric': metric_name,
-                'datapoints': [
-                    {
-                        'timestamp': dp['Timestamp'].isoformat(),
-                        'average': dp['Average'],
-                        'maximum': dp['Maximum']
-                    } for dp in datapoints
-                ],
+                'datapoints': points,
                 'summary': {
-                    'avg': sum(d['Average'] for d in datapoints) / len(datapoints) if datapoints else 0,
-                    'max': max((d['Maximum'] for d in datapoints), default=0),
-                    'count': len(datapoints)
+                    'avg': total / len(points) if points else 0,
+                    'max': peak,
+                    'count': len(points)
                 }
             }
             
@@ -181,7 +346,8 @@ class MCPTools:
             params: {
                 'log_group': str,
                 'hours': int,
-                'pattern': str (default: 'ERROR')
+                'pattern': str (default: 'ERROR'),
+                'limit': int (default: 20)
             }
         
         Returns:
@@ -196,19 +362,22 @@ class MCPTools:
             log_group = params.get('log_group', '/aws/lambda/*')
             hours = params.get('hours', 1)
             error_pattern = params.get('pattern', 'ERROR')
+            limit = int(params.get('limit', 20))
             
             # Calculate time range (CloudWatch Logs uses milliseconds)
-            end_time = int(datetime.now().timestamp() * 1000)
-            start_time = int((datetime.now() - timedelta(hours=hours)).timestamp() * 1000)
+            now = time.time()
+            end_time = int(now * 1000)
+            start_time = int((now - hours * 3600) * 1000)
             
-            # Query logs
-            response = logs.filter_log_events(
+            # Query logs; pages can come back short (or empty) while more
+            # matches remain, so follow nextToken until the limit is reached
+            response = logs.get_paginator('filter_log_events').paginate(
                 logGroupName=log_group,
                 startTime=start_time,
                 endTime=end_time,
                 filterPattern=error_pattern,
-                limit=100
-            )
+                PaginationConfig={'MaxItems': limit, 'PageSize': limit}
+            ).build_full_result()
             
             # Record success
             self.logs_breaker.record_success()
@@ -221,14 +390,14 @@ class MCPTools:
                 'event_count': len(events),
                 'events': [
                     {
-                        'timestamp': datetime.fromtimestamp(event['timestamp'] / 1000).isoformat(),
+                        'timestamp': _fmt_ts(event['timestamp']),
                         'message': event['message'][:500]  # Truncate long messages
                     }
-                    for event in events[:20]  # Limit to 20 events
+                    for event in islice(events, limit)
                 ],
                 'time_range': {
-                    'start': datetime.fromtimestamp(start_time / 1000).isoformat(),
-                    'end': datetime.fromtimestamp(end_time / 1000).isoformat()
+                    'start': _fmt_ts(start_time),
+                    'end': _fmt_ts(end_time)
                 }
             }
             
@@ -253,58 +422,100 @@ class MCPTools:
         try:
             service_name = params.get('service_name', '')
             
-            # Get error rate from logs
-            error_logs = self.get_error_logs({
+            # Dashboards poll the same service repeatedly; reuse a recent result
+            cached = _HEALTH_CACHE.get(service_name)
+            if cached and time.monotonic() - cached[0] < HEALTH_CACHE_TTL:
+                return cached[1]
+            
+            # Error rate from logs and performance metrics are fetched concurrently
+            logs_future = _POOL.submit(self.get_error_logs, {
                 'log_group': f'/aws/lambda/{service_name}',
                 'hours': 1,
                 'pattern': 'ERROR'
             })
-            
-            # Get performance metrics
-            cpu_metrics = self.get_cpu_metrics({
-                'resource_id': service_name,
-                'resource_type': 'Lambda',
-                'hours': 1
-            })
+            metrics_future = _POOL.submit(self._get_duration_summary, service_name)
+            error_logs = logs_future.result()
+            duration = metrics_future.result()
             
             # Determine health status
             error_count = error_logs.get('event_count', 0)
-            avg_duration = cpu_metrics.get('summary', {}).get('avg', 0)
-            max_duration = cpu_metrics.get('summary', {}).get('max', 0)
+            avg_duration = duration.get('avg', 0)
+            max_duration = duration.get('max', 0)
+            metrics = {
+                'error_count': error_count,
+                'avg_duration_ms': avg_duration,
+                'max_duration_ms': max_duration
+            }
             
-            # Health logic
-            health_status = 'healthy'
+            # Health logic: worst status among the rules that fire
+            severity = 0
             issues = []
+            tripped = set()
             
-            if error_count > 10:
-                health_status = 'unhealthy'
-                issues.append(f'High error rate: {error_count} errors in past hour')
-            elif error_count > 5:
-                health_status = 'degraded'
-                issues.append(f'Elevated error rate: {error_count} errors')
+            for metric, threshold, status, issue in HEALTH_THRESHOLDS:
+                value = metrics[metric]
+                if value > threshold and metric not in tripped:
+                    tripped.add(metric)
+                    severity = max(severity, HEALTH_SEVERITY.index(status))
+                    issues.append(issue.format(value))
             
-            if avg_duration > 5000:
-                health_status = 'degraded' if health_status == 'healthy' else health_status
-                issues.append(f'High average latency: {avg_duration}ms')
+            health_status = HEALTH_SEVERITY[severity]
             
-            if max_duration > 10000:
-                health_status = 'degraded' if health_status == 'healthy' else health_status
-                issues.append(f'Peak latency spike: {max_duration}ms')
-            
-            return {
+            health = {
                 'service_name': service_name,
                 'health_status': health_status,
-                'metrics': {
-                    'error_count': error_count,
-                    'avg_duration_ms': avg_duration,
-                    'max_duration_ms': max_duration
-                },
+                'metrics': metrics,
                 'issues': issues,
                 'recommendation': self._get_health_recommendation(health_status, error_count, avg_duration),
                 'checked_at': datetime.now().isoformat()
             }
             
+            # Only cache checks where both sources answered
+            if 'error' not in error_logs and 'error' not in duration:
+                if len(_HEALTH_CACHE) >= HEALTH_CACHE_SIZE:
+                    _HEALTH_CACHE.pop(next(iter(_HEALTH_CACHE)))
+                _HEALTH_CACHE[service_name] = (time.monotonic(), health)
+            
+            return health
+            
+        except Exception as e:
+            return {'error': str(e)}
+    
+    def _get_duration_summary(self, service_name: str) -> Dict:
+        """Average and peak Lambda Duration over the past hour in one get_metric_data call"""
+        
+        if self.cloudwatch_breaker.is_open():
+            return {'error': 'Circuit breaker OPEN for CloudWatch', 'retry_after': 60}
+        
+        try:
+            metric = {
+                'Namespace': 'AWS/Lambda',
+                'MetricName': 'Duration',
+                'Dimensions': [{'Name': 'FunctionName', 'Value': service_name}]
+            }
+            now = time.time()
+            response = cloudwatch.get_metric_data(
+                MetricDataQueries=[
+                    {'Id': 'avg', 'MetricStat': {'Metric': metric, 'Period': 300, 'Stat': 'Average'}},
+                    {'Id': 'max', 'MetricStat': {'Metric': metric, 'Period': 300, 'Stat': 'Maximum'}}
+                ],
+                StartTime=datetime.fromtimestamp(now - 3600, tz=timezone.utc),
+                EndTime=datetime.fromtimestamp(now, tz=timezone.utc)
+            )
+            
+            self.cloudwatch_breaker.record_success()
+            
+            # Same summary get_cpu_metrics reports: mean of the 5 minute
+            # averages and the largest 5 minute maximum
+            values = {r['Id']: r['Values'] for r in response['MetricDataResults']}
+            averages = values.get('avg', [])
+            return {
+                'avg': sum(averages) / len(averages) if averages else 0,
+                'max': max(values.get('max', []), default=0)
+            }
+            
         except Exception as e:
+            self.cloudwatch_breaker.record_failure()
             return {'error': str(e)}
     
     def _get_health_recommendation(self, status, errors, duration):
@@ -316,6 +527,9 @@ class MCPTools:
         else:
             return "Service is operating normally. Continue monitoring."
 
+# Built once per container; the tools and their breakers hold no per-request state
+_TOOLS = MCPTools()
+
 def lambda_handler(event, context):
     """
     MCP Lambda Handler
@@ -329,10 +543,11 @@ def lambda_handler(event, context):
     }
     """
     
-    print(f"Received event: {json.dumps(event)}")
+    # Serializing the event is only worth paying for when it will be logged
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Received event: %s", _dumps(event, default=str).decode())
     
     try:
-        tools = MCPTools()
         action = event.get('action', 'execute')
         
         # Handle tool discovery
@@ -356,7 +571,8 @@ def lambda_handler(event, context):
                         'parameters': {
                             'log_group': 'Log group name (e.g., /aws/lambda/FunctionName)',
                             'hours': 'Number of hours to look back (default: 1)',
-                            'pattern': 'Search pattern (default: ERROR)'
+                            'pattern': 'Search pattern (default: ERROR)',
+                            'limit': 'Maximum number of events (default: 20)'
                         },
                         'returns': 'List of log events matching the pattern'
                     },
@@ -376,13 +592,8 @@ def lambda_handler(event, context):
             tool_name = event.get('tool_name')
             parameters = event.get('parameters', {})
             
-            if tool_name == 'get_cpu_metrics':
-                result = tools.get_cpu_metrics(parameters)
-            elif tool_name == 'get_error_logs':
-                result = tools.get_error_logs(parameters)
-            elif tool_name == 'check_service_health':
-                result = tools.check_service_health(parameters)
-            else:
+            tool = _TOOLS._dispatch.get(tool_name)
+            if tool is None:
                 return {
                     'statusCode': 400,
                     'error': f'Unknown tool: {tool_name}'
@@ -390,7 +601,7 @@ def lambda_handler(event, context):
             
             return {
                 'statusCode': 200,
-                'result': result
+                'result': tool(parameters)
             }
         
         else:
@@ -400,10 +611,11 @@ def lambda_handler(event, context):
             }
     
     except Exception as e:
-        print(f"Error in MCP handler: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in MCP handler")
         return {
             'statusCode': 500,
             'error': str(e)
-        }
\ No newline at end of file
+        }
+    
+    finally:
+        _drain_breaker_writes()
\ No newline at end of file
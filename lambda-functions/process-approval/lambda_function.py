@@ -4,18 +4,59 @@ Handles approval/rejection of remediation plans
 Provides API for approval workflow management
 """
 
+import base64
+import hashlib
+import hmac
 import json
+import os
+import time
 import boto3
 from datetime import datetime
+from decimal import Decimal
 from typing import Dict, Optional
 
 dynamodb = boto3.resource('dynamodb')
 stepfunctions = boto3.client('stepfunctions')
 sns = boto3.client('sns')
+secretsmanager = boto3.client('secretsmanager')
+lambda_client = boto3.client('lambda')
 
 approval_queue_table = dynamodb.Table('ITOps-ApprovalQueue')
 incidents_table = dynamodb.Table('ITOps-Incidents')
 
+# HMAC key shared with the remediation executor for approval tokens
+APPROVAL_TOKEN_SECRET_ID = os.environ.get('APPROVAL_TOKEN_SECRET_ID')
+APPROVAL_TOKEN_TTL = 900  # seconds
+_approval_token_key = None
+
+# Remediation executor invoked once a plan is approved; unset keeps the
+# execution simulated
+REMEDIATION_EXECUTOR_FUNCTION = os.environ.get('REMEDIATION_EXECUTOR_FUNCTION')
+
+
+def _issue_approval_token(approval_id: str) -> Optional[str]:
+    """Sign a short-lived base64(approval_id|expiry|hmac_sha256) approval token"""
+    
+    global _approval_token_key
+    if not APPROVAL_TOKEN_SECRET_ID:
+        return None
+    if _approval_token_key is None:
+        secret = secretsmanager.get_secret_value(SecretId=APPROVAL_TOKEN_SECRET_ID)
+        _approval_token_key = secret['SecretString'].encode()
+    
+    expiry = int(time.time()) + APPROVAL_TOKEN_TTL
+    payload = f"{approval_id}|{expiry}"
+    signature = hmac.new(_approval_token_key, payload.encode(), hashlib.sha256).hexdigest()
+    return base64.urlsafe_b64encode(f"{payload}|{signature}".encode()).decode()
+
+
+def _json_default(obj):
+    """Serialize DynamoDB numbers as JSON numbers (whole values as ints)"""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
 class ApprovalProcessor:
     """Handles approval workflow processing"""
     
@@ -314,11 +355,32 @@ Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}
         try:
             plan = approval.get('plan', {})
             
-            # In production, invoke execute-remediation Lambda
-            # For now, simulate
+            # The executor's event; the signed approval token lets it skip its
+            # approval table read (without one it falls back to that read)
+            payload = {
+                'incident_id': incident_id,
+                'remediation_plan': plan,
+                'approval_id': approval['approval_id'],
+                'approval_token': _issue_approval_token(approval['approval_id'])
+            }
+            
+            if REMEDIATION_EXECUTOR_FUNCTION:
+                lambda_client.invoke(
+                    FunctionName=REMEDIATION_EXECUTOR_FUNCTION,
+                    InvocationType='Event',
+                    Payload=json.dumps(payload, default=_json_default)
+                )
+                
+                return {
+                    'triggered': True,
+                    'simulated': False,
+                    'message': f'Execution triggered ({REMEDIATION_EXECUTOR_FUNCTION})'
+                }
+            
+            # No executor configured - simulate
             print(f"[EXECUTION] Would trigger remediation execution:")
             print(f"  Incident: {incident_id}")
-            print(f"  Plan: {json.dumps(plan, indent=2)}")
+            print(f"  Plan: {json.dumps(plan, indent=2, default=_json_default)}")
             
             return {
                 'triggered': True,
@@ -4,22 +4,77 @@ Generates realistic test incidents for system testing
 Creates various incident scenarios with different severities
 """
 
+import bisect
 import json
+import logging
+import os
 import boto3
+from botocore.config import Config
 import random
-from datetime import datetime, timedelta
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
 from typing import Dict, List
 
-dynamodb = boto3.resource('dynamodb')
-stepfunctions = boto3.client('stepfunctions')
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:  # orjson missing from the package; fall back to stdlib
+    def _dumps(obj, default=None):
+        return json.dumps(obj, default=default).encode()
+
+# Batches log per incident, so only warnings and errors are written by default
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'WARNING'))
+
+# Batches hit both services from many threads: a pool wide enough for the
+# workflow threads plus batch_writer, and adaptive (client-side rate
+# limited) retries so throttling backs off instead of failing the batch
+_CFG = Config(
+    max_pool_connections=50,
+    retries={'mode': 'adaptive', 'max_attempts': 10},
+    tcp_keepalive=True
+)
+dynamodb = boto3.resource('dynamodb', config=_CFG)
+stepfunctions = boto3.client('stepfunctions', config=_CFG)
 
 incidents_table = dynamodb.Table('ITOps-Incidents')
 
+STATE_MACHINE_ARN = os.environ.get(
+    'STATE_MACHINE_ARN',
+    'arn:aws:states:us-east-1:005185643085:stateMachine:ITOps-IncidentWorkflow'
+)
+
+# Starts batch workflows concurrently; kept well under the connection pool
+# and StartExecution's default throttling limits
+_WORKFLOW_POOL = ThreadPoolExecutor(max_workers=16)
+
+# Random severity mix (10/20/40/30%) as cumulative weights for bisect
+_SEVERITIES = ('critical', 'high', 'medium', 'low')
+_SEVERITY_CUM_WEIGHTS = (0.1, 0.3, 0.7, 1.0)
+
+# Baseline (cpu %, memory %, error rate %) each generated metric set jitters around
+_BASE_METRICS = {
+    'critical': (95, 98, 45),
+    'high': (85, 90, 25),
+    'medium': (70, 75, 10),
+    'low': (50, 60, 2)
+}
+
 class TestDataGenerator:
     """Generates test incident data"""
     
     def __init__(self):
         self.generator_id = 'test-data-generator'
+        # scenario name -> bound method, built once with the generator
+        self._scenario_dispatch = {
+            'cascade_failure': self._scenario_cascade_failure,
+            'gradual_degradation': self._scenario_gradual_degradation,
+            'security_event': self._scenario_security_event,
+            'capacity_issue': self._scenario_capacity_issue,
+            'network_problem': self._scenario_network_problem
+        }
     
     # Incident templates
     INCIDENT_TEMPLATES = {
@@ -27,25 +82,25 @@ class TestDataGenerator:
             {
                 'title': 'Complete Database Outage',
                 'description': 'Primary RDS instance is completely unresponsive. All database connections timing out. Total system outage affecting all users.',
-                'affected_services': ['RDS', 'EC2', 'Lambda', 'API-Gateway'],
+                'affected_services': ('RDS', 'EC2', 'Lambda', 'API-Gateway'),
                 'detected_by': 'PagerDuty'
             },
             {
                 'title': 'DDoS Attack Detected',
                 'description': 'Massive spike in traffic from suspicious sources. Application servers overwhelmed. Service degraded for all customers.',
-                'affected_services': ['CloudFront', 'ALB', 'WAF', 'EC2'],
+                'affected_services': ('CloudFront', 'ALB', 'WAF', 'EC2'),
                 'detected_by': 'AWS Shield'
             },
             {
                 'title': 'Data Loss - S3 Bucket Deleted',
                 'description': 'Critical S3 bucket accidentally deleted. Customer data potentially lost. Immediate recovery required.',
-                'affected_services': ['S3', 'Lambda', 'CloudFront'],
+                'affected_services': ('S3', 'Lambda', 'CloudFront'),
                 'detected_by': 'Manual'
             },
             {
                 'title': 'Security Breach - Unauthorized Access',
                 'description': 'Suspicious activity detected in production account. Potential security breach. Multiple failed login attempts from unknown IPs.',
-                'affected_services': ['IAM', 'CloudTrail', 'GuardDuty'],
+                'affected_services': ('IAM', 'CloudTrail', 'GuardDuty'),
                 'detected_by': 'GuardDuty'
             }
         ],
@@ -53,31 +108,31 @@ class TestDataGenerator:
             {
                 'title': 'High Memory Usage on Lambda',
                 'description': 'Lambda function consuming 95% memory consistently. Causing throttling and timeout errors. Multiple users affected.',
-                'affected_services': ['Lambda', 'API-Gateway', 'DynamoDB'],
+                'affected_services': ('Lambda', 'API-Gateway', 'DynamoDB'),
                 'detected_by': 'CloudWatch'
             },
             {
                 'title': 'API Gateway 504 Timeouts',
                 'description': 'API Gateway experiencing high rate of 504 timeout errors. Affecting 30% of requests. User complaints increasing.',
-                'affected_services': ['API-Gateway', 'Lambda', 'VPC'],
+                'affected_services': ('API-Gateway', 'Lambda', 'VPC'),
                 'detected_by': 'CloudWatch'
             },
             {
                 'title': 'DynamoDB Throttling',
                 'description': 'DynamoDB table hitting throughput limits. Read/write requests being throttled. Application performance degraded.',
-                'affected_services': ['DynamoDB', 'Lambda'],
+                'affected_services': ('DynamoDB', 'Lambda'),
                 'detected_by': 'CloudWatch'
             },
             {
                 'title': 'EC2 Instance High CPU',
                 'description': 'Production EC2 instances running at 90%+ CPU for extended period. Response times degraded. Auto-scaling not responding.',
-                'affected_services': ['EC2', 'Auto Scaling', 'ALB'],
+                'affected_services': ('EC2', 'Auto Scaling', 'ALB'),
                 'detected_by': 'CloudWatch'
             },
             {
                 'title': 'S3 Bucket Permission Error',
                 'description': 'Critical S3 bucket suddenly returning 403 errors. Bucket policy may have been modified. Affecting file uploads.',
-                'affected_services': ['S3', 'Lambda', 'CloudFront'],
+                'affected_services': ('S3', 'Lambda', 'CloudFront'),
                 'detected_by': 'Application Logs'
             }
         ],
@@ -85,31 +140,31 @@ class TestDataGenerator:
             {
                 'title': 'Intermittent API Timeouts',
                 'description': 'API experiencing intermittent timeout errors. Affecting approximately 10% of requests. Pattern unclear.',
-                'affected_services': ['API-Gateway', 'Lambda'],
+                'affected_services': ('API-Gateway', 'Lambda'),
                 'detected_by': 'CloudWatch'
             },
             {
                 'title': 'CloudWatch Logs Storage Increase',
                 'description': 'CloudWatch Logs storage increased by 200% over baseline. Potential logging misconfiguration.',
-                'affected_services': ['CloudWatch', 'Lambda'],
+                'affected_services': ('CloudWatch', 'Lambda'),
                 'detected_by': 'Cost Monitoring'
             },
             {
                 'title': 'Slow Database Queries',
                 'description': 'Database query performance degraded. Average query time increased from 50ms to 300ms. No obvious bottleneck.',
-                'affected_services': ['RDS', 'Lambda'],
+                'affected_services': ('RDS', 'Lambda'),
                 'detected_by': 'Performance Monitor'
             },
             {
                 'title': 'Certificate Expiring Soon',
                 'description': 'SSL certificate for production domain expiring in 7 days. Renewal process needs to be initiated.',
-                'affected_services': ['ACM', 'CloudFront', 'ALB'],
+                'affected_services': ('ACM', 'CloudFront', 'ALB'),
                 'detected_by': 'Certificate Monitor'
             },
             {
                 'title': 'Lambda Cold Start Issues',
                 'description': 'Lambda functions experiencing increased cold start times. First invocations taking 3-5 seconds.',
-                'affected_services': ['Lambda', 'API-Gateway'],
+                'affected_services': ('Lambda', 'API-Gateway'),
                 'detected_by': 'Performance Monitor'
             }
         ],
@@ -117,66 +172,88 @@ class TestDataGenerator:
             {
                 'title': 'Minor UI Rendering Glitch',
                 'description': 'Button alignment issue on dashboard. Cosmetic only, no functional impact. Reported by single user.',
-                'affected_services': ['Frontend', 'S3'],
+                'affected_services': ('Frontend', 'S3'),
                 'detected_by': 'User Report'
             },
             {
                 'title': 'Deprecated API Warning',
                 'description': 'Using deprecated AWS SDK version. No immediate impact but should be updated for future compatibility.',
-                'affected_services': ['Lambda'],
+                'affected_services': ('Lambda',),
                 'detected_by': 'Code Review'
             },
             {
                 'title': 'Unused Resources Detected',
                 'description': 'Several unused EC2 instances and old snapshots identified. Cost optimization opportunity.',
-                'affected_services': ['EC2', 'EBS'],
+                'affected_services': ('EC2', 'EBS'),
                 'detected_by': 'Cost Explorer'
             },
             {
                 'title': 'Documentation Outdated',
                 'description': 'API documentation does not reflect recent changes. No operational impact but needs updating.',
-                'affected_services': ['Documentation'],
+                'affected_services': ('Documentation',),
                 'detected_by': 'Manual Review'
             }
         ]
     }
     
-    def generate_incident(self, severity: str = None, trigger_workflow: bool = True) -> Dict:
+    # Same templates as tuples for random.choice
+    TEMPLATES_BY_SEVERITY = {
+        severity: tuple(templates) for severity, templates in INCIDENT_TEMPLATES.items()
+    }
+    
+    def generate_incident(self, severity: str = None, trigger_workflow: bool = True, persist: bool = True) -> Dict:
         """
         Generate a single test incident
         
         Args:
             severity: Specific severity level (critical, high, medium, low) or random
             trigger_workflow: Whether to trigger Step Functions workflow
+            persist: Whether to save the incident to DynamoDB
         
         Returns:
             Generated incident data
         """
         
+        incident = self._build_incident(severity)
+        
+        # Save to DynamoDB
+        if persist:
+            self._save_incident(incident)
+        
+        # Trigger workflow if requested
+        workflow_result = None
+        if trigger_workflow:
+            workflow_result = self._trigger_workflow(incident['incident_id'], incident)
+        
+        return self._summarize(incident, persist, trigger_workflow, workflow_result)
+    
+    def _build_incident(self, severity: str = None, timestamp: int = None) -> Dict:
+        """Build a random test incident item (no I/O)"""
+        
         # Choose severity
         if not severity:
-            severity = random.choices(
-                ['critical', 'high', 'medium', 'low'],
-                weights=[0.1, 0.2, 0.4, 0.3]
-            )[0]
+            severity = _SEVERITIES[bisect.bisect(_SEVERITY_CUM_WEIGHTS, random.random())]
         
         # Select random template
-        templates = self.INCIDENT_TEMPLATES.get(severity, self.INCIDENT_TEMPLATES['medium'])
+        templates = self.TEMPLATES_BY_SEVERITY.get(severity) or self.TEMPLATES_BY_SEVERITY['medium']
         template = random.choice(templates)
         
         # Generate incident
-        timestamp = int(datetime.now().timestamp())
-        incident_id = f"INC-TEST-{severity.upper()}-{timestamp}"
+        if timestamp is None:
+            timestamp = int(time.time())
+        # Batches share one timestamp, so a random suffix keeps IDs unique
+        incident_id = f"INC-TEST-{severity.upper()}-{timestamp}-{uuid.uuid4().hex[:6]}"
         
+        # Templates are never mutated, so their values (including the
+        # affected_services tuples) are shared rather than copied
         incident = {
+            **template,
             'incident_id': incident_id,
             'created_at': timestamp,
-            'title': template['title'],
-            'description': template['description'],
+            'created_date': time.strftime('%Y-%m-%d', time.gmtime(timestamp)),
             'severity': severity,
             'status': 'open',
-            'affected_services': template['affected_services'],
-            'detected_by': template['detected_by'],
+            'status_severity': f"open#{severity}",
             'environment': 'test',
             'region': 'us-east-1',
             'tags': ['test', 'generated', severity],
@@ -184,30 +261,28 @@ class TestDataGenerator:
             'metrics': self._generate_metrics(severity)
         }
         
-        # Save to DynamoDB
-        self._save_incident(incident)
-        
-        # Trigger workflow if requested
-        workflow_result = None
-        if trigger_workflow:
-            workflow_result = self._trigger_workflow(incident_id, incident)
+        return incident
+    
+    def _summarize(self, incident: Dict, created: bool, trigger_workflow: bool, workflow_result: Dict) -> Dict:
+        """Result entry reported for one generated incident"""
         
         return {
-            'incident_id': incident_id,
-            'severity': severity,
-            'title': template['title'],
-            'created': True,
+            'incident_id': incident['incident_id'],
+            'severity': incident['severity'],
+            'title': incident['title'],
+            'created': created,
             'workflow_triggered': trigger_workflow,
             'workflow_execution': workflow_result
         }
     
-    def generate_batch(self, count: int = 10, trigger_workflow: bool = False) -> Dict:
+    def generate_batch(self, count: int = 10, trigger_workflow: bool = False, persist: bool = True) -> Dict:
         """
         Generate multiple test incidents
         
         Args:
             count: Number of incidents to generate
             trigger_workflow: Whether to trigger workflows
+            persist: Whether to save the incidents to DynamoDB
         
         Returns:
             Batch generation results
@@ -225,58 +300,85 @@ class TestDataGenerator:
             }
         }
         
+        timestamp = int(time.time())
+        incidents = []
         for i in range(count):
             try:
-                incident = self.generate_incident(trigger_workflow=trigger_workflow)
-                results['generated'].append(incident)
-                results['by_severity'][incident['severity']] += 1
+                incidents.append((i, self._build_incident(timestamp=timestamp)))
             except Exception as e:
                 results['failed'].append({
                     'index': i,
                     'error': str(e)
                 })
         
+        # One batch_writer for the whole batch instead of a PutItem per incident
+        if persist:
+            try:
+                self._save_incidents([incident for _, incident in incidents])
+            except Exception as e:
+                results['failed'].extend({'index': i, 'error': str(e)} for i, _ in incidents)
+                return results
+        
+        for summary in self._start_workflows([incident for _, incident in incidents], trigger_workflow, persist):
+            results['generated'].append(summary)
+            results['by_severity'][summary['severity']] += 1
+        
         return results
     
-    def generate_scenario(self, scenario_name: str, trigger_workflow: bool = True) -> Dict:
+    def _generate_many(self, severities: List[str], trigger_workflow: bool, persist: bool) -> List[Dict]:
+        """Build, batch-save and (optionally) start workflows for one incident per severity"""
+        
+        timestamp = int(time.time())
+        incidents = [self._build_incident(severity, timestamp) for severity in severities]
+        if persist:
+            self._save_incidents(incidents)
+        return self._start_workflows(incidents, trigger_workflow, persist)
+    
+    def _start_workflows(self, incidents: List[Dict], trigger_workflow: bool, persisted: bool) -> List[Dict]:
+        """Start workflows for saved incidents concurrently; returns their result entries"""
+        
+        if trigger_workflow:
+            # start_execution calls overlap instead of running back to back;
+            # _trigger_workflow reports its own failures
+            workflow_results = _WORKFLOW_POOL.map(
+                lambda incident: self._trigger_workflow(incident['incident_id'], incident),
+                incidents
+            )
+        else:
+            workflow_results = [None] * len(incidents)
+        
+        return [
+            self._summarize(incident, persisted, trigger_workflow, workflow_result)
+            for incident, workflow_result in zip(incidents, workflow_results)
+        ]
+    
+    def generate_scenario(self, scenario_name: str, trigger_workflow: bool = True, persist: bool = True) -> Dict:
         """
         Generate specific test scenario
         
         Args:
             scenario_name: Name of scenario to generate
             trigger_workflow: Whether to trigger workflows
+            persist: Whether to save the incidents to DynamoDB
         
         Returns:
             Scenario generation results
         """
         
-        scenarios = {
-            'cascade_failure': self._scenario_cascade_failure,
-            'gradual_degradation': self._scenario_gradual_degradation,
-            'security_event': self._scenario_security_event,
-            'capacity_issue': self._scenario_capacity_issue,
-            'network_problem': self._scenario_network_problem
-        }
-        
-        if scenario_name not in scenarios:
+        scenario = self._scenario_dispatch.get(scenario_name)
+        if scenario is None:
             return {
                 'error': f"Unknown scenario: {scenario_name}",
-                'available_scenarios': list(scenarios.keys())
+                'available_scenarios': list(self._scenario_dispatch)
             }
         
-        return scenarios[scenario_name](trigger_workflow)
+        return scenario(trigger_workflow, persist)
     
-    def _scenario_cascade_failure(self, trigger_workflow: bool) -> Dict:
+    def _scenario_cascade_failure(self, trigger_workflow: bool, persist: bool) -> Dict:
         """Simulate cascading failure scenario"""
         
-        incidents = []
-        
-        # Start with database issue
-        incidents.append(self.generate_incident('high', trigger_workflow))
-        
-        # Followed by dependent service failures
-        for severity in ['medium', 'medium', 'low']:
-            incidents.append(self.generate_incident(severity, trigger_workflow))
+        # Database issue followed by dependent service failures
+        incidents = self._generate_many(['high', 'medium', 'medium', 'low'], trigger_workflow, persist)
         
         return {
             'scenario': 'cascade_failure',
@@ -284,14 +386,10 @@ class TestDataGenerator:
             'incidents': incidents
         }
     
-    def _scenario_gradual_degradation(self, trigger_workflow: bool) -> Dict:
+    def _scenario_gradual_degradation(self, trigger_workflow: bool, persist: bool) -> Dict:
         """Simulate gradual performance degradation"""
         
-        incidents = [
-            self.generate_incident('low', trigger_workflow),
-            self.generate_incident('medium', trigger_workflow),
-            self.generate_incident('high', trigger_workflow)
-        ]
+        incidents = self._generate_many(['low', 'medium', 'high'], trigger_workflow, persist)
         
         return {
             'scenario': 'gradual_degradation',
@@ -299,22 +397,19 @@ class TestDataGenerator:
             'incidents': incidents
         }
     
-    def _scenario_security_event(self, trigger_workflow: bool) -> Dict:
+    def _scenario_security_event(self, trigger_workflow: bool, persist: bool) -> Dict:
         """Simulate security incident"""
         
         return {
             'scenario': 'security_event',
             'description': 'Security breach detected',
-            'incidents': [self.generate_incident('critical', trigger_workflow)]
+            'incidents': [self.generate_incident('critical', trigger_workflow, persist)]
         }
     
-    def _scenario_capacity_issue(self, trigger_workflow: bool) -> Dict:
+    def _scenario_capacity_issue(self, trigger_workflow: bool, persist: bool) -> Dict:
         """Simulate capacity/scaling issue"""
         
-        incidents = [
-            self.generate_incident('medium', trigger_workflow),
-            self.generate_incident('high', trigger_workflow)
-        ]
+        incidents = self._generate_many(['medium', 'high'], trigger_workflow, persist)
         
         return {
             'scenario': 'capacity_issue',
@@ -322,31 +417,25 @@ class TestDataGenerator:
             'incidents': incidents
         }
     
-    def _scenario_network_problem(self, trigger_workflow: bool) -> Dict:
+    def _scenario_network_problem(self, trigger_workflow: bool, persist: bool) -> Dict:
         """Simulate network connectivity issue"""
         
         return {
             'scenario': 'network_problem',
             'description': 'Network connectivity degraded',
-            'incidents': [self.generate_incident('high', trigger_workflow)]
+            'incidents': [self.generate_incident('high', trigger_workflow, persist)]
         }
     
     def _generate_metrics(self, severity: str) -> Dict:
         """Generate realistic metrics based on severity"""
         
-        base_metrics = {
-            'critical': {'cpu': 95, 'memory': 98, 'error_rate': 45},
-            'high': {'cpu': 85, 'memory': 90, 'error_rate': 25},
-            'medium': {'cpu': 70, 'memory': 75, 'error_rate': 10},
-            'low': {'cpu': 50, 'memory': 60, 'error_rate': 2}
-        }
-        
-        metrics = base_metrics.get(severity, base_metrics['medium'])
+        cpu, memory, error_rate = _BASE_METRICS.get(severity) or _BASE_METRICS['medium']
         
         return {
-            'cpu_utilization': metrics['cpu'] + random.randint(-5, 5),
-            'memory_utilization': metrics['memory'] + random.randint(-5, 5),
-            'error_rate': metrics['error_rate'] + random.uniform(-2, 2),
+            'cpu_utilization': cpu + random.randint(-5, 5),
+            'memory_utilization': memory + random.randint(-5, 5),
+            # DynamoDB rejects floats; keep two decimal places as a Decimal
+            'error_rate': Decimal(f"{error_rate + random.uniform(-2, 2):.2f}"),
             'request_count': random.randint(1000, 10000),
             'response_time_ms': random.randint(100, 3000)
         }
@@ -356,24 +445,36 @@ class TestDataGenerator:
         
         try:
             incidents_table.put_item(Item=incident)
-            print(f"Saved test incident: {incident['incident_id']}")
+            logger.debug("Saved test incident: %s", incident['incident_id'])
         except Exception as e:
-            print(f"Error saving incident: {e}")
+            logger.error("Error saving incident: %s", e)
+            raise
+    
+    def _save_incidents(self, incidents: List[Dict]):
+        """Save several incidents to DynamoDB with batched writes"""
+        
+        try:
+            # Up to 25 puts per BatchWriteItem; unprocessed items are resent
+            with incidents_table.batch_writer() as batch:
+                for incident in incidents:
+                    batch.put_item(Item=incident)
+            logger.debug("Saved %d test incidents", len(incidents))
+        except Exception as e:
+            logger.error("Error saving incidents: %s", e)
             raise
     
     def _trigger_workflow(self, incident_id: str, incident: Dict) -> Dict:
         """Trigger Step Functions workflow"""
         
         try:
-            state_machine_arn = 'arn:aws:states:us-east-1:005185643085:stateMachine:ITOps-IncidentWorkflow'
-            
             execution = stepfunctions.start_execution(
-                stateMachineArn=state_machine_arn,
-                name=f"{incident_id}_{int(datetime.now().timestamp())}",
-                input=json.dumps({
+                stateMachineArn=STATE_MACHINE_ARN,
+                # Nanosecond suffix keeps a re-trigger of the same incident distinct
+                name=f"{incident_id}_{time.time_ns()}",
+                input=_dumps({
                     'incident_id': incident_id,
                     'incident': incident
-                })
+                }, default=float).decode()
             )
             
             return {
@@ -382,13 +483,16 @@ class TestDataGenerator:
             }
         
         except Exception as e:
-            print(f"Error triggering workflow: {e}")
+            logger.warning("Error triggering workflow for %s: %s", incident_id, e)
             return {
                 'triggered': False,
                 'error': str(e)
             }
 
 
+# Built once per container and reused by warm invocations
+generator = TestDataGenerator()
+
 def lambda_handler(event, context):
     """
     Lambda handler for test data generation
@@ -399,81 +503,85 @@ def lambda_handler(event, context):
     {
         "action": "generate",
         "severity": "critical|high|medium|low",
-        "trigger_workflow": true
+        "trigger_workflow": true,
+        "persist": true
     }
     
     2. Generate batch:
     {
         "action": "batch",
         "count": 10,
-        "trigger_workflow": false
+        "trigger_workflow": false,
+        "persist": true
     }
     
     3. Generate scenario:
     {
         "action": "scenario",
         "scenario": "cascade_failure|gradual_degradation|security_event|capacity_issue|network_problem",
-        "trigger_workflow": true
+        "trigger_workflow": true,
+        "persist": true
     }
-    """
     
-    print(f"Test Data Generator received: {json.dumps(event)}")
+    persist=false skips the DynamoDB writes (workflow-only load tests); the
+    workflow input still carries the full incident.
+    """
     
-    generator = TestDataGenerator()
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Test Data Generator received: %s", _dumps(event, default=str).decode())
     
     try:
         action = event.get('action', 'generate')
+        persist = event.get('persist', True)
         
         if action == 'generate':
             severity = event.get('severity')
             trigger_workflow = event.get('trigger_workflow', True)
             
-            result = generator.generate_incident(severity, trigger_workflow)
+            result = generator.generate_incident(severity, trigger_workflow, persist)
             
             return {
                 'statusCode': 200,
-                'body': json.dumps(result)
+                'body': _dumps(result).decode()
             }
         
         elif action == 'batch':
             count = event.get('count', 10)
             trigger_workflow = event.get('trigger_workflow', False)
             
-            result = generator.generate_batch(count, trigger_workflow)
+            result = generator.generate_batch(count, trigger_workflow, persist)
             
             return {
                 'statusCode': 200,
-                'body': json.dumps(result)
+                'body': _dumps(result).decode()
             }
         
         elif action == 'scenario':
             scenario = event.get('scenario', 'cascade_failure')
             trigger_workflow = event.get('trigger_workflow', True)
             
-            result = generator.generate_scenario(scenario, trigger_workflow)
+            result = generator.generate_scenario(scenario, trigger_workflow, persist)
             
             return {
                 'statusCode': 200,
-                'body': json.dumps(result)
+                'body': _dumps(result).decode()
             }
         
         else:
             return {
                 'statusCode': 400,
-                'body': json.dumps({
+                'body': _dumps({
                     'error': f"Invalid action: {action}",
                     'valid_actions': ['generate', 'batch', 'scenario']
-                })
+                }).decode()
             }
     
     except Exception as e:
-        print(f"Error in test data generator: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in test data generator")
         
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': _dumps({
                 'error': str(e)
-            })
+            }).decode()
         }
\ No newline at end of file
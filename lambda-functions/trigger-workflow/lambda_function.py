@@ -4,28 +4,133 @@ Manually triggers Step Functions workflow for incidents
 Can be called from API, CLI, or other services
 """
 
+import hashlib
 import json
+import os
+import time
+import uuid
 import boto3
-from datetime import datetime
-from typing import Dict, Optional
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor, wait
+from decimal import Decimal
+from typing import Dict, List, Optional
 
-dynamodb = boto3.resource('dynamodb')
-stepfunctions = boto3.client('stepfunctions')
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:  # orjson missing from the package; fall back to stdlib
+    def _dumps(obj, default=None):
+        return json.dumps(obj, default=default, separators=(',', ':')).encode()
+    _loads = json.loads
+
+def _json_default(obj):
+    """Serialize DynamoDB numbers as JSON numbers (whole values as ints)"""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _event_sort_key(event_ms: int) -> Decimal:
+    """Timeline sort key: epoch ms plus a random fraction, so events other
+    writers log for the same incident in the same millisecond don't overwrite"""
+    return Decimal(f"{event_ms}.{uuid.uuid4().int % 10**12:012d}")
+
+def _deep_decimalize(item):
+    """Replace DynamoDB Decimals with ints/floats in place, walking the item once"""
+    stack = [item]
+    while stack:
+        node = stack.pop()
+        pairs = node.items() if isinstance(node, dict) else enumerate(node)
+        for key, value in pairs:
+            if isinstance(value, Decimal):
+                node[key] = int(value) if value % 1 == 0 else float(value)
+            elif isinstance(value, (dict, list)):
+                stack.append(value)
+    return item
+
+def _to_json(obj) -> str:
+    """Compact JSON text for response bodies and Step Functions input
+
+    Incidents are decimalized when read, so with orjson the default hook is
+    never reached on the hot path; it remains as a guard for stray Decimals.
+    """
+    return _dumps(obj, default=_json_default).decode()
+
+# Keep-alive connections are reused across warm invocations; the pool is
+# sized for batch triggers and retries back off adaptively when throttled
+_CFG = Config(
+    tcp_keepalive=True,
+    max_pool_connections=50,
+    retries={'mode': 'adaptive', 'max_attempts': 5}
+)
+dynamodb = boto3.resource('dynamodb', config=_CFG)
+stepfunctions = boto3.client('stepfunctions', config=_CFG)
 
 incidents_table = dynamodb.Table('ITOps-Incidents')
+# One item per timeline event, keyed (incident_id, event_ts: ms + random fraction)
+timeline_table = dynamodb.Table('ITOps-IncidentTimeline')
+
+STATE_MACHINE_ARN = os.environ.get(
+    'STATE_MACHINE_ARN',
+    'arn:aws:states:us-east-1:005185643085:stateMachine:ITOps-IncidentWorkflow'
+)
+# An execution's ARN is this prefix plus its name
+_EXECUTION_ARN_PREFIX = STATE_MACHINE_ARN.replace(':stateMachine:', ':execution:', 1) + ':'
+
+# Incident attributes the workflow's agents, escalation and verification
+# steps read; everything else (timeline, metadata, ...) stays in DynamoDB
+WORKFLOW_INCIDENT_FIELDS = (
+    'incident_id', 'created_at', 'title', 'description', 'severity',
+    'status', 'affected_services', 'detected_by'
+)
+
+# Resolve credentials and open each client's connection during init rather
+# than on the first invocation. Set LAMBDA_WARMUP=0 to skip (e.g. locally).
+if os.environ.get('LAMBDA_WARMUP', '1') == '1':
+    for _warm in (
+        lambda: stepfunctions.describe_state_machine(stateMachineArn=STATE_MACHINE_ARN),
+        lambda: incidents_table.get_item(Key={'incident_id': '__warmup__', 'created_at': 0})
+    ):
+        try:
+            _warm()
+        except Exception as e:
+            print(f"Warmup call failed: {e}")
+# Console link for an execution ARN, in the state machine's region
+CONSOLE_URL_TMPL = (
+    f"https://console.aws.amazon.com/states/home?region={STATE_MACHINE_ARN.split(':')[3]}"
+    "#/executions/details/{}"
+)
+
+# Overlaps the per-incident round trips of trigger_batch (well inside the
+# 50-connection client pool)
+_BATCH_POOL = ThreadPoolExecutor(max_workers=16)
+
+# Timeline events are written off the request path; the handler waits up to
+# TIMELINE_DRAIN_TIMEOUT for them before returning
+TIMELINE_DRAIN_TIMEOUT = 2.0
+_WRITE_POOL = ThreadPoolExecutor(max_workers=4)
+_PENDING_WRITES = []
+
+def _drain_pending_writes():
+    """Wait for outstanding timeline writes, forgetting finished ones"""
+    if _PENDING_WRITES:
+        wait(_PENDING_WRITES, timeout=TIMELINE_DRAIN_TIMEOUT)
+        _PENDING_WRITES[:] = [f for f in _PENDING_WRITES if not f.done()]
 
 class WorkflowTrigger:
     """Handles workflow triggering and management"""
     
     def __init__(self):
         self.trigger_id = 'workflow-trigger'
-        self.state_machine_arn = 'arn:aws:states:us-east-1:005185643085:stateMachine:ITOps-IncidentWorkflow'
     
     def trigger_workflow(
         self,
         incident_id: str = None,
         incident_data: Dict = None,
-        execution_name: str = None
+        execution_name: str = None,
+        created_at: int = None,
+        idempotency_key: str = None
     ) -> Dict:
         """
         Trigger Step Functions workflow
@@ -34,6 +139,9 @@ class WorkflowTrigger:
             incident_id: Existing incident ID or None for new
             incident_data: Incident data (required if incident_id not provided)
             execution_name: Custom execution name (optional)
+            created_at: Incident sort key, if known (saves a Query)
+            idempotency_key: Distinguishes deliberate re-runs; repeated calls
+                             with the same key return the same execution
         
         Returns:
             Workflow trigger result
@@ -41,22 +149,29 @@ class WorkflowTrigger:
         
         # Case 1: Existing incident - fetch from DynamoDB
         if incident_id and not incident_data:
-            incident_data = self._get_incident(incident_id)
+            incident_data = self._get_incident(incident_id, created_at)
             if not incident_data:
                 return {
                     'success': False,
                     'error': f'Incident {incident_id} not found'
                 }
+            created_at = incident_data['created_at']
         
         # Case 2: New incident - create it
         elif not incident_id and incident_data:
-            incident_id = self._create_incident(incident_data)
+            incident = self._create_incident(incident_data)
+            incident_id = incident['incident_id']
+            created_at = incident['created_at']
             incident_data['incident_id'] = incident_id
         
         # Case 3: Both provided - use as-is
         elif incident_id and incident_data:
             # Ensure incident_id matches
             incident_data['incident_id'] = incident_id
+            created_at = incident_data.get('created_at', created_at)
+            if created_at is None:
+                existing = self._get_incident(incident_id)
+                created_at = existing['created_at'] if existing else None
         
         # Case 4: Neither provided - error
         else:
@@ -65,63 +180,91 @@ class WorkflowTrigger:
                 'error': 'Must provide either incident_id or incident_data'
             }
         
-        # Generate execution name
+        # Deterministic execution name, so a repeated request maps onto the
+        # execution it already started instead of launching another
         if not execution_name:
-            timestamp = int(datetime.now().timestamp())
-            execution_name = f"{incident_id}_{timestamp}"
+            digest = hashlib.sha1(f"{incident_id}:{idempotency_key or ''}".encode()).hexdigest()
+            execution_name = f"{incident_id}_{digest[:16]}"
         
         # Start Step Functions execution
         try:
+            # Only the fields the workflow reads are passed along, keeping the
+            # input small and well under the Step Functions payload limit.
+            # Serialized once, compactly (incidents read back from DynamoDB are
+            # already decimalized)
+            incident = {k: incident_data[k] for k in WORKFLOW_INCIDENT_FIELDS if k in incident_data}
+            workflow_input = _to_json({'incident_id': incident_id, 'incident': incident})
+            
             response = stepfunctions.start_execution(
-                stateMachineArn=self.state_machine_arn,
+                stateMachineArn=STATE_MACHINE_ARN,
                 name=execution_name,
-                input=json.dumps({
-                    'incident_id': incident_id,
-                    'incident': incident_data
-                })
+                input=workflow_input
             )
             
             execution_arn = response['executionArn']
             
             # Update incident with workflow info
-            self._update_incident_workflow(incident_id, execution_arn)
+            self._update_incident_workflow(incident_id, created_at, execution_arn)
             
             return {
                 'success': True,
                 'incident_id': incident_id,
                 'execution_arn': execution_arn,
                 'execution_name': execution_name,
-                'state_machine': self.state_machine_arn,
+                'state_machine': STATE_MACHINE_ARN,
                 'started_at': response['startDate'].isoformat(),
                 'message': 'Workflow started successfully',
                 'console_url': self._get_console_url(execution_arn)
             }
         
         except stepfunctions.exceptions.ExecutionAlreadyExists:
+            return self._existing_execution(incident_id, execution_name)
+        
+        except Exception as e:
             return {
                 'success': False,
-                'error': f'Execution {execution_name} already exists',
-                'suggestion': 'Use a different execution name or wait for current execution to complete'
+                'error': f'Failed to start workflow: {str(e)}'
             }
+    
+    def _existing_execution(self, incident_id: str, execution_name: str) -> Dict:
+        """Result for a trigger whose execution name was already used"""
         
+        execution_arn = _EXECUTION_ARN_PREFIX + execution_name
+        try:
+            response = stepfunctions.describe_execution(executionArn=execution_arn)
         except Exception as e:
             return {
                 'success': False,
-                'error': f'Failed to start workflow: {str(e)}'
+                'error': f'Execution {execution_name} already exists: {str(e)}',
+                'suggestion': 'Use a different execution name or idempotency_key'
             }
+        
+        return {
+            'success': True,
+            'deduplicated': True,
+            'incident_id': incident_id,
+            'execution_arn': execution_arn,
+            'execution_name': execution_name,
+            'state_machine': STATE_MACHINE_ARN,
+            'status': response['status'],
+            'started_at': response['startDate'].isoformat(),
+            'message': 'Workflow already started for this request',
+            'console_url': self._get_console_url(execution_arn)
+        }
     
-    def retry_workflow(self, incident_id: str) -> Dict:
+    def retry_workflow(self, incident_id: str, created_at: int = None) -> Dict:
         """
         Retry workflow for failed incident
         
         Args:
             incident_id: Incident to retry
+            created_at: Incident sort key, if known (saves a Query)
         
         Returns:
             Retry result
         """
         
-        incident_data = self._get_incident(incident_id)
+        incident_data = self._get_incident(incident_id, created_at)
         if not incident_data:
             return {
                 'success': False,
@@ -129,7 +272,7 @@ class WorkflowTrigger:
             }
         
         # Generate new execution name with retry suffix
-        timestamp = int(datetime.now().timestamp())
+        timestamp = int(time.time())
         execution_name = f"{incident_id}_retry_{timestamp}"
         
         return self.trigger_workflow(
@@ -138,45 +281,72 @@ class WorkflowTrigger:
             execution_name=execution_name
         )
     
-    def trigger_batch(self, incident_ids: list) -> Dict:
+    def trigger_batch(self, incident_ids: list, new_incidents: List[Dict] = None) -> Dict:
         """
         Trigger workflows for multiple incidents
         
         Args:
-            incident_ids: List of incident IDs
+            incident_ids: List of incident IDs, or of {'incident_id', 'created_at'}
+                          keys (fetched together with BatchGetItem)
+            new_incidents: Incident payloads to create (in one bulk write)
+                           and trigger along with them
         
         Returns:
             Batch trigger results
         """
         
-        results = {
-            'total': len(incident_ids),
-            'succeeded': [],
-            'failed': []
-        }
-        
-        for incident_id in incident_ids:
-            result = self.trigger_workflow(incident_id=incident_id)
+        # Prefetch every fully keyed incident up front; anything not returned
+        # here is looked up individually by trigger_workflow
+        keys = [entry for entry in incident_ids if isinstance(entry, dict)]
+        prefetched = {}
+        if keys:
+            try:
+                prefetched = self._batch_get_incidents(keys)
+            except Exception as e:
+                print(f"Error batch-getting incidents: {e}")
+        
+        # New incidents are triggered from the items just written
+        incident_ids = list(incident_ids)
+        for incident in self._create_incidents_bulk(new_incidents) if new_incidents else ():
+            prefetched[(incident['incident_id'], incident['created_at'])] = incident
+            incident_ids.append({'incident_id': incident['incident_id'], 'created_at': incident['created_at']})
+        
+        def trigger(entry):
+            if not isinstance(entry, dict):
+                return entry, self.trigger_workflow(incident_id=entry)
             
+            incident_id, created_at = entry.get('incident_id'), entry.get('created_at')
+            incident = prefetched.get((incident_id, created_at))
+            if incident:
+                return incident_id, self.trigger_workflow(incident_id=incident_id, incident_data=incident)
+            return incident_id, self.trigger_workflow(incident_id=incident_id, created_at=created_at)
+        
+        # Incidents are triggered concurrently; results are collected here,
+        # on the calling thread, in request order
+        batch = _BATCH_POOL.map(trigger, incident_ids)
+        
+        succeeded = []
+        failed = []
+        for incident_id, result in batch:
             if result.get('success'):
-                results['succeeded'].append({
-                    'incident_id': incident_id,
-                    'execution_arn': result.get('execution_arn')
-                })
+                succeeded.append({'incident_id': incident_id, 'execution_arn': result.get('execution_arn')})
             else:
-                results['failed'].append({
-                    'incident_id': incident_id,
-                    'error': result.get('error')
-                })
+                failed.append({'incident_id': incident_id, 'error': result.get('error')})
         
-        return results
+        return {
+            'total': len(incident_ids),
+            'succeeded': succeeded,
+            'failed': failed
+        }
     
-    def get_execution_status(self, execution_arn: str) -> Dict:
+    def get_execution_status(self, execution_arn: str, raw: bool = False) -> Dict:
         """
         Get current status of workflow execution
         
         Args:
             execution_arn: Step Functions execution ARN
+            raw: Return input/output as the JSON strings Step Functions holds
+                 ('input_raw'/'output_raw') instead of parsing them
         
         Returns:
             Execution status details
@@ -187,15 +357,22 @@ class WorkflowTrigger:
                 executionArn=execution_arn
             )
             
-            return {
+            result = {
                 'success': True,
                 'execution_arn': execution_arn,
                 'status': response['status'],
                 'started_at': response['startDate'].isoformat(),
-                'stopped_at': response.get('stopDate', '').isoformat() if response.get('stopDate') else None,
-                'input': json.loads(response['input']),
-                'output': json.loads(response.get('output', '{}')) if response.get('output') else None
+                'stopped_at': response['stopDate'].isoformat() if response.get('stopDate') else None
             }
+            
+            if raw:
+                result['input_raw'] = response.get('input')
+                result['output_raw'] = response.get('output')
+            else:
+                result['input'] = _loads(response['input']) if response.get('input') else None
+                result['output'] = _loads(response['output']) if response.get('output') else None
+            
+            return result
         
         except Exception as e:
             return {
@@ -235,88 +412,254 @@ class WorkflowTrigger:
                 'error': str(e)
             }
     
-    def _get_incident(self, incident_id: str) -> Optional[Dict]:
-        """Get incident from DynamoDB"""
+    def _get_incident(self, incident_id: str, created_at: int = None) -> Optional[Dict]:
+        """Get incident from DynamoDB (GetItem when the full key is known)"""
         
         try:
+            if created_at is not None:
+                response = incidents_table.get_item(
+                    Key={'incident_id': incident_id, 'created_at': created_at}
+                )
+                item = response.get('Item')
+                return _deep_decimalize(item) if item else None
+            
             response = incidents_table.query(
                 KeyConditionExpression='incident_id = :id',
-                ExpressionAttributeValues={':id': incident_id}
+                ExpressionAttributeValues={':id': incident_id},
+                Limit=1
             )
             
             items = response.get('Items', [])
-            return items[0] if items else None
+            return _deep_decimalize(items[0]) if items else None
         
         except Exception as e:
             print(f"Error getting incident: {e}")
             return None
     
-    def _create_incident(self, incident_data: Dict) -> str:
-        """Create new incident in DynamoDB"""
+    def _batch_get_incidents(self, keys: List[Dict]) -> Dict:
+        """Fetch incidents by full key, 100 per BatchGetItem; returns {(incident_id, created_at): item}"""
+        
+        # BatchGetItem rejects duplicate keys within a request
+        unique = {
+            (key['incident_id'], key['created_at']): {
+                'incident_id': key['incident_id'],
+                'created_at': key['created_at']
+            }
+            for key in keys
+        }
+        pending = list(unique.values())
+        found = {}
         
-        timestamp = int(datetime.now().timestamp())
-        incident_id = incident_data.get('incident_id') or f"INC-{timestamp}"
+        for start in range(0, len(pending), 100):
+            request = {incidents_table.name: {'Keys': pending[start:start + 100]}}
+            
+            # Throttled reads come back as UnprocessedKeys rather than errors
+            for attempt in range(5):
+                response = dynamodb.batch_get_item(RequestItems=request)
+                for item in response['Responses'].get(incidents_table.name, []):
+                    _deep_decimalize(item)
+                    found[(item['incident_id'], item['created_at'])] = item
+                
+                request = response.get('UnprocessedKeys')
+                if not request:
+                    break
+                time.sleep(0.05 * 2 ** attempt)
+        
+        return found
+    
+    def _new_incident(self, incident_data: Dict, timestamp: int, incident_id: str) -> Dict:
+        """Build the stored item for a new incident"""
         
-        incident = {
+        return {
             'incident_id': incident_id,
             'created_at': timestamp,
+            'created_date': time.strftime('%Y-%m-%d', time.gmtime(timestamp)),
             'title': incident_data.get('title', 'Untitled Incident'),
             'description': incident_data.get('description', ''),
             'severity': incident_data.get('severity', 'medium'),
             'status': 'open',
+            'status_severity': f"open#{incident_data.get('severity', 'medium')}",
             'affected_services': incident_data.get('affected_services', []),
             'detected_by': incident_data.get('detected_by', 'manual'),
             'timeline': []
         }
+    
+    def _create_incident(self, incident_data: Dict) -> Dict:
+        """Create new incident in DynamoDB; returns the stored item"""
+        
+        timestamp = int(time.time())
+        # The random suffix keeps same-second creations from sharing a key
+        incident_id = incident_data.get('incident_id') or f"INC-{timestamp}-{uuid.uuid4().hex[:8]}"
+        incident = self._new_incident(incident_data, timestamp, incident_id)
         
         try:
-            incidents_table.put_item(Item=incident)
+            incidents_table.put_item(Item=incident, ReturnConsumedCapacity='NONE')
             print(f"Created incident: {incident_id}")
-            return incident_id
+            return incident
         
         except Exception as e:
             print(f"Error creating incident: {e}")
             raise
     
-    def _update_incident_workflow(self, incident_id: str, execution_arn: str):
+    def _create_incidents_bulk(self, incidents_data: List[Dict]) -> List[Dict]:
+        """Create several incidents with one batch writer; returns the stored items"""
+        
+        # Every item shares created_at, so a repeated incident_id would
+        # silently replace an earlier one in the same batch
+        given_ids = [data['incident_id'] for data in incidents_data if data.get('incident_id')]
+        duplicates = sorted({incident_id for incident_id in given_ids if given_ids.count(incident_id) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate incident_id in batch: {', '.join(duplicates)}")
+        
+        timestamp = int(time.time())
+        incidents = [
+            self._new_incident(data, timestamp, data.get('incident_id') or f"INC-{timestamp}-{uuid.uuid4().hex[:8]}")
+            for data in incidents_data
+        ]
+        
+        try:
+            # 25 items per BatchWriteItem, unprocessed items resent by the writer
+            with incidents_table.batch_writer() as batch:
+                for incident in incidents:
+                    batch.put_item(Item=incident)
+            print(f"Created {len(incidents)} incidents")
+            return incidents
+        
+        except Exception as e:
+            print(f"Error creating incidents: {e}")
+            raise
+    
+    def _update_incident_workflow(self, incident_id: str, created_at: Optional[int], execution_arn: str):
         """Update incident with workflow execution info"""
         
+        if created_at is None:
+            print(f"No stored incident for {incident_id}; skipping workflow update")
+            return
+        
+        now_ms = int(time.time() * 1000)
+        
         try:
-            response = incidents_table.query(
-                KeyConditionExpression='incident_id = :id',
-                ExpressionAttributeValues={':id': incident_id}
+            # The condition rejects the write if the incident row is gone,
+            # instead of reading it first
+            incidents_table.update_item(
+                Key={'incident_id': incident_id, 'created_at': created_at},
+                UpdateExpression='SET workflow_execution_arn = :arn, workflow_started_at = :timestamp',
+                ConditionExpression='attribute_exists(incident_id)',
+                ExpressionAttributeValues={
+                    ':arn': execution_arn,
+                    ':timestamp': now_ms // 1000
+                }
             )
-            
-            if response.get('Items'):
-                created_at = response['Items'][0]['created_at']
-                
-                incidents_table.update_item(
-                    Key={'incident_id': incident_id, 'created_at': created_at},
-                    UpdateExpression='''
-                        SET workflow_execution_arn = :arn,
-                            workflow_started_at = :timestamp,
-                            timeline = list_append(if_not_exists(timeline, :empty_list), :event)
-                    ''',
-                    ExpressionAttributeValues={
-                        ':arn': execution_arn,
-                        ':timestamp': int(datetime.now().timestamp()),
-                        ':empty_list': [],
-                        ':event': [{
-                            'timestamp': int(datetime.now().timestamp()),
-                            'event': 'workflow_started',
-                            'actor': 'workflow_trigger',
-                            'details': f'Execution ARN: {execution_arn}'
-                        }]
-                    }
-                )
+        
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                print(f"Incident {incident_id} not found; skipping workflow update")
+            else:
+                print(f"Error updating incident: {e}")
+            return
         
         except Exception as e:
             print(f"Error updating incident: {e}")
+            return
+        
+        # The event goes to the timeline table rather than growing the
+        # incident item with list_append
+        _PENDING_WRITES.append(_WRITE_POOL.submit(self._record_timeline_event, {
+            'incident_id': incident_id,
+            'event_ts': _event_sort_key(now_ms),
+            'timestamp': now_ms // 1000,
+            'event': 'workflow_started',
+            'actor': 'workflow_trigger',
+            'details': f'Execution ARN: {execution_arn}'
+        }))
+    
+    def _record_timeline_event(self, event: Dict):
+        """Write one ITOps-IncidentTimeline item"""
+        
+        try:
+            timeline_table.put_item(Item=event)
+        except Exception as e:
+            print(f"Error recording timeline event: {e}")
     
     def _get_console_url(self, execution_arn: str) -> str:
         """Generate AWS Console URL for execution"""
         
-        return f"https://console.aws.amazon.com/states/home?region=us-east-1#/executions/details/{execution_arn}"
+        return CONSOLE_URL_TMPL.format(execution_arn)
+
+
+def _result_response(result: Dict) -> Dict:
+    return {
+        'statusCode': 200 if result.get('success') else 400,
+        'body': _to_json(result)
+    }
+
+def _missing_field(field: str) -> Dict:
+    return {
+        'statusCode': 400,
+        'body': _to_json({
+            'success': False,
+            'error': f'Missing {field}'
+        })
+    }
+
+def _h_trigger(trigger: WorkflowTrigger, event: Dict) -> Dict:
+    return _result_response(trigger.trigger_workflow(
+        incident_id=event.get('incident_id'),
+        incident_data=event.get('incident'),
+        execution_name=event.get('execution_name'),
+        created_at=event.get('created_at'),
+        idempotency_key=event.get('idempotency_key')
+    ))
+
+def _h_retry(trigger: WorkflowTrigger, event: Dict) -> Dict:
+    incident_id = event.get('incident_id')
+    if not incident_id:
+        return _missing_field('incident_id')
+    
+    return _result_response(trigger.retry_workflow(incident_id, event.get('created_at')))
+
+def _h_batch(trigger: WorkflowTrigger, event: Dict) -> Dict:
+    incident_ids = event.get('incident_ids', [])
+    new_incidents = event.get('incidents', [])
+    if not incident_ids and not new_incidents:
+        return _missing_field('incident_ids')
+    
+    try:
+        result = trigger.trigger_batch(incident_ids, new_incidents)
+    except ValueError as e:
+        return {
+            'statusCode': 400,
+            'body': _to_json({'success': False, 'error': str(e)})
+        }
+    
+    return {
+        'statusCode': 200,
+        'body': _to_json(result)
+    }
+
+def _h_status(trigger: WorkflowTrigger, event: Dict) -> Dict:
+    execution_arn = event.get('execution_arn')
+    if not execution_arn:
+        return _missing_field('execution_arn')
+    
+    return _result_response(trigger.get_execution_status(execution_arn, bool(event.get('raw'))))
+
+def _h_stop(trigger: WorkflowTrigger, event: Dict) -> Dict:
+    execution_arn = event.get('execution_arn')
+    if not execution_arn:
+        return _missing_field('execution_arn')
+    
+    return _result_response(trigger.stop_execution(execution_arn, event.get('reason')))
+
+# Action name -> handler(trigger, event); the WorkflowTrigger is only built
+# once the action is known to be valid
+HANDLERS = {
+    'trigger': _h_trigger,
+    'retry': _h_retry,
+    'batch': _h_batch,
+    'status': _h_status,
+    'stop': _h_stop
+}
 
 
 def lambda_handler(event, context):
@@ -325,10 +668,12 @@ def lambda_handler(event, context):
     
     Event formats:
     
-    1. Trigger for existing incident:
+    1. Trigger for existing incident ("created_at" optional; skips a Query):
     {
         "action": "trigger",
-        "incident_id": "INC-XXXXX"
+        "incident_id": "INC-XXXXX",
+        "created_at": 1700000000,
+        "idempotency_key": "optional - vary it to start a fresh run"
     }
     
     2. Trigger with new incident:
@@ -348,16 +693,19 @@ def lambda_handler(event, context):
         "incident_id": "INC-XXXXX"
     }
     
-    4. Trigger batch:
+    4. Trigger batch (full keys are fetched together with BatchGetItem;
+       "incidents" are created in one bulk write, then triggered):
     {
         "action": "batch",
-        "incident_ids": ["INC-001", "INC-002"]
+        "incident_ids": ["INC-001", {"incident_id": "INC-002", "created_at": 1700000000}],
+        "incidents": [{"title": "...", "severity": "high"}]
     }
     
-    5. Get execution status:
+    5. Get execution status ("raw": true returns input/output unparsed):
     {
         "action": "status",
-        "execution_arn": "arn:..."
+        "execution_arn": "arn:...",
+        "raw": false
     }
     
     6. Stop execution:
@@ -368,115 +716,23 @@ def lambda_handler(event, context):
     }
     """
     
-    print(f"Workflow Trigger received: {json.dumps(event)}")
-    
-    trigger = WorkflowTrigger()
+    print(f"Workflow Trigger received: {_to_json(event)}")
     
     try:
         action = event.get('action', 'trigger')
         
-        if action == 'trigger':
-            incident_id = event.get('incident_id')
-            incident_data = event.get('incident')
-            execution_name = event.get('execution_name')
-            
-            result = trigger.trigger_workflow(
-                incident_id=incident_id,
-                incident_data=incident_data,
-                execution_name=execution_name
-            )
-            
-            return {
-                'statusCode': 200 if result.get('success') else 400,
-                'body': json.dumps(result)
-            }
-        
-        elif action == 'retry':
-            incident_id = event.get('incident_id')
-            
-            if not incident_id:
-                return {
-                    'statusCode': 400,
-                    'body': json.dumps({
-                        'success': False,
-                        'error': 'Missing incident_id'
-                    })
-                }
-            
-            result = trigger.retry_workflow(incident_id)
-            
-            return {
-                'statusCode': 200 if result.get('success') else 400,
-                'body': json.dumps(result)
-            }
-        
-        elif action == 'batch':
-            incident_ids = event.get('incident_ids', [])
-            
-            if not incident_ids:
-                return {
-                    'statusCode': 400,
-                    'body': json.dumps({
-                        'success': False,
-                        'error': 'Missing incident_ids'
-                    })
-                }
-            
-            result = trigger.trigger_batch(incident_ids)
-            
-            return {
-                'statusCode': 200,
-                'body': json.dumps(result)
-            }
-        
-        elif action == 'status':
-            execution_arn = event.get('execution_arn')
-            
-            if not execution_arn:
-                return {
-                    'statusCode': 400,
-                    'body': json.dumps({
-                        'success': False,
-                        'error': 'Missing execution_arn'
-                    })
-                }
-            
-            result = trigger.get_execution_status(execution_arn)
-            
-            return {
-                'statusCode': 200 if result.get('success') else 400,
-                'body': json.dumps(result)
-            }
-        
-        elif action == 'stop':
-            execution_arn = event.get('execution_arn')
-            reason = event.get('reason')
-            
-            if not execution_arn:
-                return {
-                    'statusCode': 400,
-                    'body': json.dumps({
-                        'success': False,
-                        'error': 'Missing execution_arn'
-                    })
-                }
-            
-            result = trigger.stop_execution(execution_arn, reason)
-            
-            return {
-                'statusCode': 200 if result.get('success') else 400,
-                'body': json.dumps(result)
-            }
-        
-        else:
+        handler = HANDLERS.get(action)
+        if handler is None:
             return {
                 'statusCode': 400,
-                'body': json.dumps({
+                'body': _to_json({
                     'success': False,
                     'error': f'Invalid action: {action}',
-                    'valid_actions': ['trigger', 'retry', 'batch', 'status', 'stop']
+                    'valid_actions': list(HANDLERS)
                 })
             }
+        
+        return handler(WorkflowTrigger(), event)
     
     except Exception as e:
         print(f"Error in workflow trigger: {e}")
@@ -485,8 +741,11 @@ def lambda_handler(event, context):
         
         return {
             'statusCode': 500,
-            'body': json.dumps({
+            'body': _to_json({
                 'success': False,
                 'error': str(e)
             })
-        }
\ No newline at end of file
+        }
+    
+    finally:
+        _drain_pending_writes()
\ No newline at end of file
@@ -370,17 +370,20 @@ class ResolutionVerifier:
                 created_at = response['Items'][0]['created_at']
                 
                 new_status = 'resolved' if verification_result['verified'] else 'monitoring'
+                severity = response['Items'][0].get('severity', 'medium')
                 
                 incidents_table.update_item(
                     Key={'incident_id': incident_id, 'created_at': created_at},
                     UpdateExpression='''
                         SET #status = :status,
+                            status_severity = :status_severity,
                             verification_result = :verification,
                             timeline = list_append(if_not_exists(timeline, :empty_list), :event)
                     ''',
                     ExpressionAttributeNames={'#status': 'status'},
                     ExpressionAttributeValues={
                         ':status': new_status,
+                        ':status_severity': f"{new_status}#{severity}",
                         ':verification': verification_result,
                         ':empty_list': [],
                         ':event': [{